@@ -95,6 +95,10 @@ if BUILD_ENV == "local":
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            # A file instead of the shared in-memory database, whose table
+            # locks fail at once: the check-in concurrency test needs
+            # writers from several threads to wait for each other
+            "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
         }
     }
 else:
@@ -110,6 +114,54 @@ else:
     }
 
 
+# Cache
+# Shared between workers in production so that cached data (e.g. compiled
+# network indexes) can be invalidated everywhere at once.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+
+
+# Check-in buffer
+# When enabled, check-ins are accepted into a staging table and written to
+# Attendance in batches by "python manage.py flush_checkins".
+CHECKIN_BUFFER_ENABLED = os.getenv("CHECKIN_BUFFER_ENABLED", "False").lower() == "true"
+
+# QR Code rendering
+# How the projector page draws the check-in QR Code: "png" (base64 image, default),
+# "svg" (inline vector) or "client" (only the URL, drawn by the browser).
+QR_RENDER_MODE = os.getenv("QR_RENDER_MODE", "png").lower()
+
+# When enabled, the projector page gets the QR Code through Server-Sent
+# Events instead of polling. Requires an ASGI server (see entrypoint.sh).
+QR_PUSH_ENABLED = os.getenv("QR_PUSH_ENABLED", "False").lower() == "true"
+
+# PDF reports
+# Processes used by "python manage.py render_reports" to lay out the chunks
+# of a large report in parallel.
+REPORT_RENDER_PROCESSES = int(os.getenv("REPORT_RENDER_PROCESSES", "1"))
+
+# SUAP student data
+# Seconds a student's curso/período is kept before the next login refreshes
+# it from SUAP, in the background (users.tasks).
+SUAP_STUDENT_DATA_TTL = int(os.getenv("SUAP_STUDENT_DATA_TTL", str(60 * 60 * 24)))
+
+# SUAP client metrics and circuit breaker transitions (users.suap) go to
+# the console of the process making the calls
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "users.suap": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -18,10 +18,11 @@ python manage.py collectstatic --clear --noinput
 echo "Setting socket directory permissions..."
 chmod 770 /run/sockets
 
-echo "Starting Gunicorn..."
+echo "Starting Gunicorn (ASGI)..."
 exec gunicorn --bind unix:/run/sockets/presente.sock \
 	--workers 3 \
+	--worker-class uvicorn_worker.UvicornWorker \
 	--timeout 60 \
 	--access-logfile - \
 	--error-logfile - \
-	config.wsgi:application
+	config.asgi:application
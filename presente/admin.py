@@ -1,4 +1,5 @@
 from django.contrib import admin
+from .facets import invalidate_activity_facets
 from .models import Activity, Attendance, Network
 
 
@@ -39,7 +40,13 @@ class AttendanceAdmin(admin.ModelAdmin):
         "ip_address",
     ]
     date_hierarchy = "checked_in_at"
-    readonly_fields = ["checked_in_at", "ip_address", "network_display"]
+    readonly_fields = [
+        "checked_in_at",
+        "ip_address",
+        "network",
+        "network_name",
+        "network_display",
+    ]
 
     def network_or_ip(self, obj):
         return obj.get_network_name()
@@ -55,3 +62,12 @@ class AttendanceAdmin(admin.ModelAdmin):
         return obj.ip_address
 
     network_display.short_description = "Rede"
+
+    def delete_queryset(self, request, queryset):
+        # Bulk delete: Attendance.delete() is not called, so the counters of
+        # the affected activities are recounted in one query
+        activity_ids = set(queryset.values_list("activity_id", flat=True))
+        super().delete_queryset(request, queryset)
+        Activity.objects.recount_attendances(pk__in=activity_ids)
+        for activity_id in activity_ids:
+            invalidate_activity_facets(activity_id)
@@ -6,3 +6,6 @@ class PresenteConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "presente"
     verbose_name = _("Presente")
+
+    def ready(self):
+        import presente.signals  # noqa
@@ -0,0 +1,61 @@
+from collections import Counter
+from uuid import uuid4
+from django.core.cache import cache
+from django.db import models, transaction
+
+# Participant fields offered as choices in ActivityAttendanceFilter
+FACET_FIELDS = ["user__campus", "user__curso", "user__periodo_referencia"]
+
+# Facets are invalidated when attendances change. Participants' SUAP data
+# (campus, curso...) only changes on login and is not tracked, so cached
+# facets also expire after a while.
+FACET_TIMEOUT = 60 * 60
+
+
+def _version_key(activity_id):
+    return f"presente:facets:version:{activity_id}"
+
+
+def get_facet_version(activity_id):
+    key = _version_key(activity_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_activity_facets(activity_id):
+    # Bumped after commit, so a request reading in between cannot cache the
+    # old facets under the new version
+    transaction.on_commit(
+        lambda: cache.set(_version_key(activity_id), uuid4().hex, timeout=None)
+    )
+
+
+def compute_facets(queryset):
+    # One grouped query over the combinations of the facet fields, folded
+    # into {field: [(value, count), ...]} sorted by value. Empty values are
+    # left out.
+    counts = {field: Counter() for field in FACET_FIELDS}
+    rows = (
+        queryset.order_by()
+        .values_list(*FACET_FIELDS)
+        .annotate(count=models.Count("pk"))
+    )
+    for *values, count in rows:
+        for field, value in zip(FACET_FIELDS, values):
+            if value:
+                counts[field][value] += count
+    return {field: sorted(counter.items()) for field, counter in counts.items()}
+
+
+def get_activity_facets(activity_id):
+    from .models import Attendance
+
+    cache_key = f"presente:facets:{activity_id}:{get_facet_version(activity_id)}"
+    facets = cache.get(cache_key)
+    if facets is None:
+        facets = compute_facets(Attendance.objects.filter(activity_id=activity_id))
+        cache.set(cache_key, facets, timeout=FACET_TIMEOUT)
+    return facets
@@ -1,9 +1,13 @@
 import django_filters
 from django import forms
+from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
 from taggit.models import Tag
+from users.models import normalize_name
+from .facets import FACET_FIELDS, compute_facets, get_activity_facets
 from .models import Activity, Attendance
+from .widgets import AutocompleteSelect
 
 User = get_user_model()
 
@@ -33,7 +37,10 @@ class ActivityFilter(django_filters.FilterSet):
         label=_("Tags"),
         field_name="tags",
         empty_label="---------",
-        widget=forms.Select(attrs={"class": "form-select"}),
+        widget=AutocompleteSelect(
+            reverse_lazy("presente:autocomplete_tags"),
+            attrs={"class": "form-select", "data-tom-select": "autocomplete"},
+        ),
     )
     start_time__gte = django_filters.DateFilter(
         field_name="start_time",
@@ -49,21 +56,7 @@ class ActivityFilter(django_filters.FilterSet):
     )
 
     def filter_status(self, queryset, name, value):
-        from django.utils import timezone
-
-        now = timezone.now()
-
-        if value == "active":
-            return queryset.filter(
-                start_time__lte=now, end_time__gte=now, is_enabled=True
-            )
-        elif value == "not_started":
-            return queryset.filter(start_time__gt=now)
-        elif value == "expired":
-            return queryset.filter(end_time__lt=now)
-        elif value == "not_enabled":
-            return queryset.filter(is_enabled=False)
-        return queryset
+        return queryset.filter_status(value)
 
     class Meta:
         model = Activity
@@ -87,7 +80,10 @@ class AttendanceFilter(django_filters.FilterSet):
         label=_("Tags"),
         field_name="activity__tags",
         empty_label="---------",
-        widget=forms.Select(attrs={"class": "form-select"}),
+        widget=AutocompleteSelect(
+            reverse_lazy("presente:autocomplete_tags"),
+            attrs={"class": "form-select", "data-tom-select": "autocomplete"},
+        ),
     )
     activity__start_time__gte = django_filters.DateFilter(
         field_name="activity__start_time",
@@ -114,10 +110,15 @@ class AttendanceFilter(django_filters.FilterSet):
 
 class ActivityAttendanceFilter(django_filters.FilterSet):
     user__full_name = django_filters.CharFilter(
-        lookup_expr="icontains",
+        method="filter_name",
         label=_("Nome"),
         widget=forms.TextInput(attrs={"class": "form-control"}),
     )
+    user__matricula = django_filters.CharFilter(
+        lookup_expr="startswith",
+        label=_("Matrícula"),
+        widget=forms.TextInput(attrs={"class": "form-control"}),
+    )
     user__type = django_filters.ChoiceFilter(
         choices=User.UserType.choices,
         label=_("Tipo"),
@@ -141,50 +142,34 @@ class ActivityAttendanceFilter(django_filters.FilterSet):
         widget=forms.Select(attrs={"class": "form-select"}),
     )
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    def filter_name(self, queryset, name, value):
+        # Accent and case insensitive; a trigram index serves it on PostgreSQL
+        return queryset.filter(
+            user__full_name_normalized__contains=normalize_name(value)
+        )
 
-        # Get distinct values from the queryset
-        if self.queryset is not None:
-            # Campus choices
-            campus_choices = [
-                (campus, campus)
-                for campus in self.queryset.exclude(user__campus__isnull=True)
-                .exclude(user__campus="")
-                .values_list("user__campus", flat=True)
-                .distinct()
-                .order_by("user__campus")
-            ]
-            self.filters["user__campus"].extra["choices"] = campus_choices
-
-            # Curso choices
-            curso_choices = [
-                (curso, curso)
-                for curso in self.queryset.exclude(user__curso__isnull=True)
-                .exclude(user__curso="")
-                .values_list("user__curso", flat=True)
-                .distinct()
-                .order_by("user__curso")
-            ]
-            self.filters["user__curso"].extra["choices"] = curso_choices
+    def __init__(self, *args, activity=None, **kwargs):
+        super().__init__(*args, **kwargs)
 
-            # Periodo_referencia choices
-            periodo_choices = [
-                (periodo, periodo)
-                for periodo in self.queryset.exclude(
-                    user__periodo_referencia__isnull=True
-                )
-                .exclude(user__periodo_referencia="")
-                .values_list("user__periodo_referencia", flat=True)
-                .distinct()
-                .order_by("user__periodo_referencia")
+        # Choices come from the participants of the activity, with the
+        # number of attendances of each value. Cached per activity when it
+        # is known, computed from the queryset otherwise.
+        if activity is not None:
+            facets = get_activity_facets(activity.pk)
+        elif self.queryset is not None:
+            facets = compute_facets(self.queryset)
+        else:
+            return
+        for field in FACET_FIELDS:
+            self.filters[field].extra["choices"] = [
+                (value, f"{value} ({count})") for value, count in facets[field]
             ]
-            self.filters["user__periodo_referencia"].extra["choices"] = periodo_choices
 
     class Meta:
         model = Attendance
         fields = [
             "user__full_name",
+            "user__matricula",
             "user__type",
             "user__campus",
             "user__curso",
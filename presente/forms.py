@@ -1,8 +1,9 @@
 from django import forms
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
-from taggit.models import Tag
+from django.urls import reverse_lazy
 from .models import Activity, Network
+from .widgets import AutocompleteSelectMultiple
 
 User = get_user_model()
 
@@ -18,8 +19,9 @@ class ActivityForm(forms.ModelForm):
         required=False,
         label="Tags",
         choices=[],
-        widget=forms.SelectMultiple(
-            attrs={"class": "form-control", "data-tom-select": "tags"}
+        widget=AutocompleteSelectMultiple(
+            reverse_lazy("presente:autocomplete_tags"),
+            attrs={"class": "form-control", "data-tom-select": "tags"},
         ),
         help_text="Tags para organizar as atividades (ex: 'Workshop 2024', 'Python')",
     )
@@ -60,8 +62,9 @@ class ActivityForm(forms.ModelForm):
             "allowed_networks": forms.CheckboxSelectMultiple(
                 attrs={"class": "form-check-input"}
             ),
-            "owners": forms.SelectMultiple(
-                attrs={"class": "form-control", "data-tom-select": "users"}
+            "owners": AutocompleteSelectMultiple(
+                reverse_lazy("presente:autocomplete_users"),
+                attrs={"class": "form-control", "data-tom-select": "users"},
             ),
         }
 
@@ -70,7 +73,8 @@ class ActivityForm(forms.ModelForm):
         self.fields["start_time"].input_formats = ["%Y-%m-%dT%H:%M"]
         self.fields["end_time"].input_formats = ["%Y-%m-%dT%H:%M"]
 
-        # Populate owners field with SERVIDOR users only
+        # Owners are SERVIDOR users only. The widget renders just the
+        # selected ones, and validation only looks up the submitted ids.
         self.fields["owners"].queryset = User.objects.filter(type="SERVIDOR").order_by(
             "email"
         )
@@ -78,11 +82,6 @@ class ActivityForm(forms.ModelForm):
             lambda obj: obj.get_full_name() or obj.email
         )
 
-        # Populate tags field with all existing tags
-        all_tags = Tag.objects.all().order_by("name")
-        tag_choices = [(tag.name, tag.name) for tag in all_tags]
-        self.fields["tags"].choices = tag_choices
-
         # Set initial tags if editing
         if self.instance and self.instance.pk:
             self.fields["tags"].initial = [tag.name for tag in self.instance.tags.all()]
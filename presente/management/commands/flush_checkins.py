@@ -0,0 +1,41 @@
+import time
+from django.core.management.base import BaseCommand
+from presente.models import PendingAttendance
+
+
+class Command(BaseCommand):
+    help = (
+        "Grava em lote as presenças recebidas pelo buffer de check-in "
+        "(CHECKIN_BUFFER_ENABLED)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Quantidade de presenças gravadas por lote (padrão: 500)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Intervalo em segundos entre as verificações (padrão: 1)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Esvazia o buffer uma vez e encerra",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            # Lag is measured before flushing: how long the oldest buffered
+            # check-in waited to be written.
+            lag = PendingAttendance.objects.lag()
+            flushed = PendingAttendance.objects.flush(batch_size=options["batch_size"])
+            if flushed:
+                self.stdout.write(f"{flushed} presenças gravadas (atraso: {lag:.1f}s)")
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from presente.models import Activity
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula o total de presenças das atividades (Activity.attendance_count) "
+        "a partir das presenças registradas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=3600,
+            help="Intervalo em segundos entre as verificações (padrão: 3600)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Verifica uma vez e encerra",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            fixed = Activity.objects.recount_attendances()
+            if fixed:
+                self.stdout.write(f"{fixed} atividades corrigidas")
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
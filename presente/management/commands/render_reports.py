@@ -0,0 +1,97 @@
+import time
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+from django.utils import timezone
+from uuid import uuid4
+from presente.models import AttendanceReport
+from presente.reports import render_report_pdf
+
+
+# Seconds between two purges of old reports while the queue is idle
+PURGE_INTERVAL = 60 * 60
+
+
+class Command(BaseCommand):
+    help = "Gera em segundo plano os relatórios de presença em PDF solicitados."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Intervalo em segundos entre as verificações (padrão: 1)",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=settings.REPORT_RENDER_PROCESSES,
+            help=(
+                "Processos usados para gerar relatórios grandes em partes "
+                "(padrão: REPORT_RENDER_PROCESSES)"
+            ),
+        )
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=7,
+            help="Dias que os relatórios gerados ficam guardados (padrão: 7)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Gera os relatórios na fila e encerra",
+        )
+
+    def handle(self, *args, **options):
+        purged_at = None
+        while True:
+            report = AttendanceReport.objects.claim()
+            if report is not None:
+                self.render(report, options["processes"])
+                continue
+
+            if purged_at is None or time.monotonic() - purged_at >= PURGE_INTERVAL:
+                purged_at = time.monotonic()
+                purged = AttendanceReport.objects.purge(options["max_age"] * 86400)
+                if purged:
+                    self.stdout.write(f"{purged} relatórios antigos removidos")
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+
+    def render(self, report, processes):
+        started = time.monotonic()
+        try:
+            pdf = render_report_pdf(report.activity, report.params, processes=processes)
+        except Exception as e:
+            report.status = AttendanceReport.Status.FAILED
+            report.error = repr(e)
+            report.finished_at = timezone.now()
+            if self.save_report(report, ["status", "error", "finished_at"]):
+                self.stderr.write(f"Relatório {report.pk} falhou: {e!r}")
+            return
+
+        report.file.save(
+            f"{report.activity_id}/{uuid4().hex}.pdf", ContentFile(pdf), save=False
+        )
+        report.status = AttendanceReport.Status.DONE
+        report.finished_at = timezone.now()
+        if not self.save_report(report, ["file", "status", "finished_at"]):
+            # No row points at the new file anymore
+            report.file.delete(save=False)
+            return
+        self.stdout.write(
+            f"Relatório {report.pk} gerado em {time.monotonic() - started:.1f}s"
+        )
+
+    def save_report(self, report, fields):
+        # False when the report was deleted while rendering (e.g. with its
+        # activity): the UPDATE matches no row and Django raises
+        try:
+            report.save(update_fields=fields)
+        except DatabaseError:
+            self.stderr.write(f"Relatório {report.pk} removido durante a geração")
+            return False
+        return True
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('presente', '0016_alter_activity_created_at_alter_activity_end_time_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='network',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendances', to='presente.network', verbose_name='Rede'),
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='network_name',
+            field=models.CharField(blank=True, help_text='Nome da rede no momento do check-in (vazio se nenhuma rede corresponder ao IP)', max_length=100, null=True, verbose_name='Nome da rede'),
+        ),
+    ]
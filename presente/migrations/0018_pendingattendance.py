@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('presente', '0017_attendance_network'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendance',
+            name='checked_in_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Registrado em'),
+        ),
+        migrations.CreateModel(
+            name='PendingAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checked_in_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Registrado em')),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True, verbose_name='Endereço IP')),
+                ('network_name', models.CharField(blank=True, max_length=100, null=True, verbose_name='Nome da rede')),
+                ('activity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_attendances', to='presente.activity', verbose_name='Atividade')),
+                ('network', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='presente.network', verbose_name='Rede')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_attendances', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Presença pendente',
+                'verbose_name_plural': 'Presenças pendentes',
+            },
+        ),
+    ]
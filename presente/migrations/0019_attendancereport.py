@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('presente', '0018_pendingattendance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True, verbose_name='Chave')),
+                ('params', models.JSONField(default=dict, verbose_name='Parâmetros')),
+                ('status', models.CharField(choices=[('pending', 'Na fila'), ('running', 'Gerando'), ('done', 'Pronto'), ('failed', 'Falhou')], db_index=True, default='pending', max_length=20, verbose_name='Situação')),
+                ('file', models.FileField(blank=True, upload_to='reports/', verbose_name='Arquivo')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+                ('activity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reports', to='presente.activity', verbose_name='Atividade')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Relatório de presenças',
+                'verbose_name_plural': 'Relatórios de presenças',
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:42
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_attendance_count(apps, schema_editor):
+    Activity = apps.get_model('presente', 'Activity')
+    Attendance = apps.get_model('presente', 'Attendance')
+
+    actual = (
+        Attendance.objects.filter(activity=OuterRef('pk'))
+        .order_by()
+        .values('activity')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    Activity.objects.update(attendance_count=Coalesce(Subquery(actual), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('presente', '0019_attendancereport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='attendance_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Presenças'),
+        ),
+        migrations.RunPython(populate_attendance_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('presente', '0020_activity_attendance_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['activity', '-checked_in_at', '-id'], name='attendance_activity_recent'),
+        ),
+    ]
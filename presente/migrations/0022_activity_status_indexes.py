@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('presente', '0021_attendance_activity_recent'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['is_enabled', 'start_time', 'end_time'], name='activity_status'),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['end_time'], name='activity_end_time'),
+        ),
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(condition=models.Q(('is_enabled', True)), fields=['start_time', 'end_time'], name='activity_enabled_period'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-18 03:10
+
+from collections import defaultdict
+from django.db import migrations
+from presente.networks import NetworkIndex, parse_ip_entries
+
+BATCH_SIZE = 1000
+
+
+def backfill_attendance_networks(apps, schema_editor):
+    # Resolve the network of the attendances registered before 0017 stored
+    # it at check-in. Rows without a match get "" (resolved, no network).
+    Network = apps.get_model('presente', 'Network')
+    Attendance = apps.get_model('presente', 'Attendance')
+    index = NetworkIndex(
+        ((pk, name), list(parse_ip_entries(ip_addresses)))
+        for pk, name, ip_addresses in Network.objects.filter(is_active=True)
+        .order_by('name')
+        .values_list('pk', 'name', 'ip_addresses')
+    )
+    pending = Attendance.objects.filter(network_name__isnull=True).only(
+        'pk', 'ip_address'
+    )
+    last_pk = 0
+    while True:
+        batch = list(pending.filter(pk__gt=last_pk).order_by('pk')[:BATCH_SIZE])
+        if not batch:
+            break
+        # One UPDATE per network found in the batch instead of a bulk_update
+        # CASE over every row
+        groups = defaultdict(list)
+        for attendance in batch:
+            network = index.lookup(attendance.ip_address) if attendance.ip_address else None
+            groups[network or (None, '')].append(attendance.pk)
+        for (network_id, network_name), pks in groups.items():
+            Attendance.objects.filter(pk__in=pks).update(
+                network_id=network_id, network_name=network_name
+            )
+        last_pk = batch[-1].pk
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('presente', '0022_activity_status_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_attendance_networks, migrations.RunPython.noop),
+    ]
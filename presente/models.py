@@ -1,9 +1,13 @@
-from django.db import models
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections, models, transaction
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from taggit.managers import TaggableManager
+from .facets import invalidate_activity_facets
 from django.db.models import Case, When, Value, IntegerField
+from django.db.models.functions import Coalesce
 
 User = get_user_model()
 
@@ -43,6 +47,21 @@ class Network(models.Model):
 
 
 class ActivityQuerySet(models.QuerySet):
+    def filter_status(self, status, now=None):
+        # Same rules as Activity.status, written as plain comparisons on the
+        # indexed columns so the database can use Activity.Meta.indexes
+        if now is None:
+            now = timezone.now()
+        if status == "expired":
+            return self.filter(end_time__lt=now)
+        elif status == "not_started":
+            return self.filter(start_time__gt=now, end_time__gte=now)
+        elif status == "not_enabled":
+            return self.filter(is_enabled=False, start_time__lte=now, end_time__gte=now)
+        elif status == "active":
+            return self.filter(is_enabled=True, start_time__lte=now, end_time__gte=now)
+        return self
+
     def with_status_order(self):
         now = timezone.now()
         return self.annotate(
@@ -56,9 +75,29 @@ class ActivityQuerySet(models.QuerySet):
         )
 
 
-class ActivityManager(models.Manager):
-    def get_queryset(self):
-        return ActivityQuerySet(self.model, using=self._db).with_status_order()
+class ActivityManager(models.Manager.from_queryset(ActivityQuerySet)):
+    def add_attendances(self, activity_id, delta):
+        # Atomic in the database, safe against concurrent check-ins
+        self.filter(pk=activity_id).update(
+            attendance_count=models.F("attendance_count") + delta
+        )
+
+    def recount_attendances(self, **filters):
+        # Set attendance_count from the attendances table for the matching
+        # activities that drifted. Returns the number of activities fixed.
+        actual = (
+            Attendance.objects.filter(activity=models.OuterRef("pk"))
+            .order_by()
+            .values("activity")
+            .annotate(count=models.Count("pk"))
+            .values("count")
+        )
+        return (
+            self.filter(**filters)
+            .annotate(actual=Coalesce(models.Subquery(actual), 0))
+            .exclude(attendance_count=models.F("actual"))
+            .update(attendance_count=Coalesce(models.Subquery(actual), 0))
+        )
 
 
 class Activity(models.Model):
@@ -106,6 +145,10 @@ class Activity(models.Model):
     modified_at = models.DateTimeField(
         _("Modificação"), auto_now=True, null=True, blank=True
     )
+    # Kept up to date on check-in, flush and delete (see AttendanceManager,
+    # PendingAttendanceManager.flush and presente.signals), and repaired by
+    # the reconcile_attendance_counts command.
+    attendance_count = models.IntegerField(_("Presenças"), default=0, editable=False)
 
     objects = ActivityManager()
 
@@ -127,43 +170,82 @@ class Activity(models.Model):
         if not self.restrict_ip:
             return True
 
-        active_networks = self.allowed_networks.filter(is_active=True)
-
-        if not active_networks.exists():
-            return False
-
-        from ipaddress import ip_address, ip_network
-
-        try:
-            client_addr = ip_address(client_ip)
-
-            for network_config in active_networks:
-                ip_list = [
-                    ip.strip()
-                    for ip in network_config.ip_addresses.split("\n")
-                    if ip.strip()
-                ]
-
-                for ip_entry in ip_list:
-                    try:
-                        if "/" in ip_entry:
-                            network_obj = ip_network(ip_entry, strict=False)
-                            if client_addr in network_obj:
-                                return True
-                        else:
-                            ip_addr = ip_address(ip_entry)
-                            if client_addr == ip_addr:
-                                return True
-                    except ValueError:
-                        continue
+        from .networks import get_activity_network_index
 
-            return False
-        except ValueError:
-            return False
+        # Only active allowed networks are indexed, so an activity without
+        # any of them rejects every address.
+        return client_ip in get_activity_network_index(self.pk)
 
     class Meta:
         verbose_name = _("Atividade")
         verbose_name_plural = _("Atividades")
+        indexes = [
+            # Status filters (see ActivityQuerySet.filter_status)
+            models.Index(
+                fields=["is_enabled", "start_time", "end_time"],
+                name="activity_status",
+            ),
+            models.Index(fields=["end_time"], name="activity_end_time"),
+            # Activities open for check-in
+            models.Index(
+                fields=["start_time", "end_time"],
+                condition=models.Q(is_enabled=True),
+                name="activity_enabled_period",
+            ),
+        ]
+
+
+class AttendanceManager(models.Manager):
+    def check_in(self, activity, user, **fields):
+        # Register the attendance with a single INSERT ... ON CONFLICT DO
+        # NOTHING RETURNING statement (PostgreSQL and SQLite), which is safe
+        # against concurrent double scans. Returns (attendance, created)
+        # like get_or_create().
+        connection = connections[self.db]
+        if not connection.features.can_return_columns_from_insert:
+            return self.get_or_create(activity=activity, user=user, defaults=fields)
+
+        attendance = self.model(
+            activity=activity, user=user, checked_in_at=timezone.now(), **fields
+        )
+        opts = self.model._meta
+        insert_fields = [f for f in opts.concrete_fields if not f.primary_key]
+        qn = connection.ops.quote_name
+        sql = (
+            "INSERT INTO {table} ({columns}) VALUES ({values}) "
+            "ON CONFLICT ({unique}) DO NOTHING RETURNING {pk}"
+        ).format(
+            table=qn(opts.db_table),
+            columns=", ".join(qn(f.column) for f in insert_fields),
+            values=", ".join(["%s"] * len(insert_fields)),
+            unique=", ".join(
+                qn(opts.get_field(name).column) for name in opts.unique_together[0]
+            ),
+            pk=qn(opts.pk.column),
+        )
+        params = [
+            f.get_db_prep_save(getattr(attendance, f.attname), connection)
+            for f in insert_fields
+        ]
+        # The row and the counter are written in one transaction, so a
+        # failed counter update cannot leave attendance_count drifting
+        with transaction.atomic(using=self.db):
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                row = cursor.fetchone()
+            if row is not None:
+                # Raw INSERT: no post_save signal
+                Activity.objects.add_attendances(activity.pk, 1)
+
+        if row is None:
+            # Already registered (e.g. the same QR Code scanned twice)
+            return self.get(activity=activity, user=user), False
+
+        attendance.pk = row[0]
+        attendance._state.adding = False
+        attendance._state.db = self.db
+        invalidate_activity_facets(activity.pk)
+        return attendance, True
 
 
 class Attendance(models.Model):
@@ -179,58 +261,261 @@ class Attendance(models.Model):
         related_name="attendances",
         verbose_name=_("Usuário"),
     )
-    checked_in_at = models.DateTimeField(_("Registrado em"), auto_now_add=True)
+    # Not auto_now_add: check-ins flushed from the buffer keep the time
+    # they were accepted, not the time they were written.
+    checked_in_at = models.DateTimeField(
+        _("Registrado em"), default=timezone.now, editable=False
+    )
     ip_address = models.GenericIPAddressField(
         _("Endereço IP"),
         blank=True,
         null=True,
         help_text=_("Endereço IP do usuário no momento do check-in"),
     )
+    network = models.ForeignKey(
+        Network,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="attendances",
+        verbose_name=_("Rede"),
+    )
+    network_name = models.CharField(
+        _("Nome da rede"),
+        max_length=100,
+        blank=True,
+        null=True,
+        help_text=_(
+            "Nome da rede no momento do check-in (vazio se nenhuma rede "
+            "corresponder ao IP)"
+        ),
+    )
+
+    objects = AttendanceManager()
 
     def __str__(self):
         return f"{self.user} - {self.activity}"
 
+    def delete(self, using=None, keep_parents=False):
+        # No post_delete receiver keeps the counter (see signals)
+        with transaction.atomic(using=using):
+            result = super().delete(using=using, keep_parents=keep_parents)
+            Activity.objects.add_attendances(self.activity_id, -1)
+        invalidate_activity_facets(self.activity_id)
+        return result
+
     def get_network_name(self):
         if not self.ip_address:
             return "-"
 
-        from ipaddress import ip_address, ip_network
-
-        try:
-            client_addr = ip_address(self.ip_address)
-
-            # Check all active networks
-            for network_config in Network.objects.filter(is_active=True):
-                ip_list = [
-                    ip.strip()
-                    for ip in network_config.ip_addresses.split("\n")
-                    if ip.strip()
-                ]
-
-                for ip_entry in ip_list:
-                    try:
-                        # Try to match as network (CIDR notation)
-                        if "/" in ip_entry:
-                            network_obj = ip_network(ip_entry, strict=False)
-                            if client_addr in network_obj:
-                                return network_config.name
-                        # Match as individual IP
-                        else:
-                            ip_addr = ip_address(ip_entry)
-                            if client_addr == ip_addr:
-                                return network_config.name
-                    except ValueError:
-                        # Invalid IP configuration, skip
-                        continue
-
-            # No network matched, return the IP address
-            return self.ip_address
-        except ValueError:
-            # Invalid IP address
-            return self.ip_address
+        # Stored at check-in time (older rows by migration 0023)
+        if self.network_name is not None:
+            return self.network_name or self.ip_address
+
+        from .networks import match_network
+
+        network = match_network(self.ip_address)
+        return network[1] if network else self.ip_address
 
     class Meta:
         verbose_name = _("Presença")
         verbose_name_plural = _("Presenças")
         unique_together = [["activity", "user"]]
         ordering = ["-checked_in_at"]
+        indexes = [
+            # Latest attendances of an activity (detail page panel)
+            models.Index(
+                fields=["activity", "-checked_in_at", "-id"],
+                name="attendance_activity_recent",
+            ),
+        ]
+
+
+class PendingAttendanceManager(models.Manager):
+    def flush(self, batch_size=500, **filters):
+        # Move buffered check-ins into Attendance. Duplicates (double scans,
+        # or two flushes racing for the same rows) are dropped by the unique
+        # constraint. Returns the number of buffered rows processed.
+        flushed = 0
+        pending = self.filter(**filters).order_by("pk")
+        while True:
+            with transaction.atomic():
+                batch = list(pending[:batch_size])
+                if not batch:
+                    break
+                Attendance.objects.bulk_create(
+                    [
+                        Attendance(
+                            activity_id=item.activity_id,
+                            user_id=item.user_id,
+                            checked_in_at=item.checked_in_at,
+                            ip_address=item.ip_address,
+                            network_id=item.network_id,
+                            network_name=item.network_name,
+                        )
+                        for item in batch
+                    ],
+                    ignore_conflicts=True,
+                )
+                self.filter(pk__in=[item.pk for item in batch]).delete()
+                # bulk_create sends no post_save signal and does not tell
+                # which rows were dropped as duplicates, so the counters of
+                # the activities in the batch are recounted
+                activity_ids = {item.activity_id for item in batch}
+                Activity.objects.recount_attendances(pk__in=activity_ids)
+                for activity_id in activity_ids:
+                    invalidate_activity_facets(activity_id)
+            flushed += len(batch)
+        return flushed
+
+    def read_through(self, **filters):
+        # Flush the matching buffered check-ins before Attendance is read,
+        # so that nothing appears lost while the worker catches up.
+        if settings.CHECKIN_BUFFER_ENABLED:
+            self.flush(**filters)
+
+    def lag(self):
+        # Age in seconds of the oldest check-in still waiting to be flushed
+        oldest = self.aggregate(oldest=models.Min("checked_in_at"))["oldest"]
+        if oldest is None:
+            return 0.0
+        return max(0.0, (timezone.now() - oldest).total_seconds())
+
+
+class PendingAttendance(models.Model):
+    # Write-behind buffer for check-ins (see CHECKIN_BUFFER_ENABLED): a plain
+    # append-only insert during the burst, flushed into Attendance in batches
+    # by the flush_checkins command.
+    activity = models.ForeignKey(
+        Activity,
+        on_delete=models.CASCADE,
+        related_name="pending_attendances",
+        verbose_name=_("Atividade"),
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="pending_attendances",
+        verbose_name=_("Usuário"),
+    )
+    checked_in_at = models.DateTimeField(_("Registrado em"), default=timezone.now)
+    ip_address = models.GenericIPAddressField(_("Endereço IP"), blank=True, null=True)
+    network = models.ForeignKey(
+        Network,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+        verbose_name=_("Rede"),
+    )
+    network_name = models.CharField(
+        _("Nome da rede"), max_length=100, blank=True, null=True
+    )
+
+    objects = PendingAttendanceManager()
+
+    def __str__(self):
+        return f"{self.user} - {self.activity}"
+
+    class Meta:
+        verbose_name = _("Presença pendente")
+        verbose_name_plural = _("Presenças pendentes")
+
+
+class AttendanceReportManager(models.Manager):
+    # A worker that dies while rendering leaves its job "running"; after this
+    # many seconds the job can be claimed again.
+    stale_after = 15 * 60
+
+    def request(self, activity, key, params, user):
+        # Job for an export, shared by identical requests. Failed jobs are
+        # queued again.
+        report, created = self.get_or_create(
+            key=key,
+            defaults={"activity": activity, "params": params, "requested_by": user},
+        )
+        if not created and report.status == AttendanceReport.Status.FAILED:
+            self.filter(pk=report.pk, status=AttendanceReport.Status.FAILED).update(
+                status=AttendanceReport.Status.PENDING, error=""
+            )
+            report.refresh_from_db()
+        return report
+
+    def claim(self):
+        # Take the oldest job waiting to be rendered. The conditional UPDATE
+        # makes sure two workers never render the same job: matching
+        # started_at too means only one of two workers reclaiming the same
+        # stale job wins.
+        stale = timezone.now() - timedelta(seconds=self.stale_after)
+        candidates = self.filter(
+            models.Q(status=AttendanceReport.Status.PENDING)
+            | models.Q(status=AttendanceReport.Status.RUNNING, started_at__lt=stale)
+        ).order_by("created_at")
+        for report in candidates[:10]:
+            claimed = self.filter(
+                pk=report.pk, status=report.status, started_at=report.started_at
+            ).update(status=AttendanceReport.Status.RUNNING, started_at=timezone.now())
+            if claimed:
+                report.refresh_from_db()
+                return report
+        return None
+
+    def purge(self, max_age):
+        # Delete reports created more than max_age seconds ago. Their files
+        # are removed by the post_delete receiver (see signals).
+        cutoff = timezone.now() - timedelta(seconds=max_age)
+        _, deleted = (
+            self.filter(created_at__lt=cutoff)
+            .exclude(status=AttendanceReport.Status.RUNNING)
+            .delete()
+        )
+        return deleted.get(self.model._meta.label, 0)
+
+
+class AttendanceReport(models.Model):
+    # PDF export rendered in the background by the render_reports command.
+    # key identifies the activity, filters, columns, sort and data version,
+    # so an identical request is served from the stored file.
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Na fila")
+        RUNNING = "running", _("Gerando")
+        DONE = "done", _("Pronto")
+        FAILED = "failed", _("Falhou")
+
+    activity = models.ForeignKey(
+        Activity,
+        on_delete=models.CASCADE,
+        related_name="reports",
+        verbose_name=_("Atividade"),
+    )
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+        verbose_name=_("Solicitado por"),
+    )
+    key = models.CharField(_("Chave"), max_length=64, unique=True)
+    params = models.JSONField(_("Parâmetros"), default=dict)
+    status = models.CharField(
+        _("Situação"),
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+        db_index=True,
+    )
+    file = models.FileField(_("Arquivo"), upload_to="reports/", blank=True)
+    error = models.TextField(_("Erro"), blank=True)
+    created_at = models.DateTimeField(_("Criado em"), auto_now_add=True)
+    started_at = models.DateTimeField(_("Iniciado em"), blank=True, null=True)
+    finished_at = models.DateTimeField(_("Concluído em"), blank=True, null=True)
+
+    objects = AttendanceReportManager()
+
+    def __str__(self):
+        return f"{self.activity} - {self.get_status_display()}"
+
+    class Meta:
+        verbose_name = _("Relatório de presenças")
+        verbose_name_plural = _("Relatórios de presenças")
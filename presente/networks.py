@@ -0,0 +1,189 @@
+from bisect import bisect_right
+from ipaddress import ip_address, ip_network
+from uuid import uuid4
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_CACHE_KEY = "presente:networks:version"
+
+
+def parse_ip_entries(ip_addresses):
+    # One entry per line, either a single address or a CIDR network.
+    # Invalid entries are skipped, as they always have been.
+    for line in ip_addresses.split("\n"):
+        entry = line.strip()
+        if not entry:
+            continue
+        try:
+            if "/" in entry:
+                yield ip_network(entry, strict=False)
+            else:
+                yield ip_network(ip_address(entry))
+        except ValueError:
+            continue
+
+
+# Sorted, non-overlapping integer ranges per address family, looked up
+# with a binary search. ``networks`` is an iterable of (label, ip_networks)
+# pairs in priority order: when ranges overlap, the first network wins,
+# the same result the old one-by-one loop returned.
+class NetworkIndex:
+    def __init__(self, networks=()):
+        ranges = {4: [], 6: []}
+        for priority, (label, entries) in enumerate(networks):
+            for network in entries:
+                ranges[network.version].append(
+                    (
+                        int(network.network_address),
+                        int(network.broadcast_address),
+                        priority,
+                        label,
+                    )
+                )
+        self._families = {
+            version: self._compile(family_ranges)
+            for version, family_ranges in ranges.items()
+        }
+
+    @staticmethod
+    def _compile(ranges):
+        starts, ends, labels = [], [], []
+        # Every range starts and ends on a boundary, so each elementary
+        # segment between two boundaries is either fully covered by a range
+        # or not covered at all.
+        bounds = sorted({r[0] for r in ranges} | {r[1] + 1 for r in ranges})
+        for low, next_low in zip(bounds, bounds[1:]):
+            high = next_low - 1
+            best = None
+            for start, end, priority, label in ranges:
+                if start <= low and high <= end:
+                    if best is None or priority < best[0]:
+                        best = (priority, label)
+            if best is None:
+                continue
+            if labels and ends[-1] == low - 1 and labels[-1] == best[1]:
+                ends[-1] = high
+            else:
+                starts.append(low)
+                ends.append(high)
+                labels.append(best[1])
+        return starts, ends, labels
+
+    def lookup(self, address):
+        try:
+            addr = ip_address(address)
+        except ValueError:
+            return None
+        starts, ends, labels = self._families[addr.version]
+        value = int(addr)
+        position = bisect_right(starts, value) - 1
+        if position >= 0 and value <= ends[position]:
+            return labels[position]
+        return None
+
+    def __contains__(self, address):
+        return self.lookup(address) is not None
+
+    def __bool__(self):
+        return any(starts for starts, _, _ in self._families.values())
+
+
+class _NetworkState:
+    def __init__(self, version):
+        self.version = version
+        self.networks = None
+        self.indexes = {}
+        self.activity_networks = {}
+
+
+_state = None
+
+
+def get_network_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, uuid4().hex, timeout=None)
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+def invalidate_network_index():
+    # Every worker compares its local version against the shared one,
+    # so a new version drops all compiled indexes on the next lookup.
+    # Bumped after commit, so a lookup reading in between cannot cache an
+    # index of the old networks under the new version.
+    transaction.on_commit(
+        lambda: cache.set(VERSION_CACHE_KEY, uuid4().hex, timeout=None)
+    )
+
+
+def _get_state():
+    global _state
+    version = get_network_version()
+    state = _state
+    if state is None or state.version != version:
+        state = _state = _NetworkState(version)
+    return state
+
+
+def _get_active_networks(state):
+    if state.networks is None:
+        from .models import Network
+
+        state.networks = {
+            pk: (name, list(parse_ip_entries(ip_addresses)))
+            for pk, name, ip_addresses in Network.objects.filter(
+                is_active=True
+            ).values_list("pk", "name", "ip_addresses")
+        }
+    return state.networks
+
+
+def _get_index(state, key):
+    index = state.indexes.get(key)
+    if index is None:
+        networks = _get_active_networks(state)
+        index = state.indexes[key] = NetworkIndex(
+            ((pk, name), entries)
+            for pk, (name, entries) in networks.items()
+            if key is None or pk in key
+        )
+    return index
+
+
+def get_network_index(network_ids=None):
+    # Compiled index of the active networks, optionally restricted to
+    # network_ids. Labels are (network_id, network_name) tuples.
+    key = None if network_ids is None else frozenset(network_ids)
+    return _get_index(_get_state(), key)
+
+
+def get_activity_network_index(activity_id):
+    state = _get_state()
+    network_ids = state.activity_networks.get(activity_id)
+    if network_ids is None:
+        from .models import Activity
+
+        network_ids = state.activity_networks[activity_id] = frozenset(
+            Activity.allowed_networks.through.objects.filter(
+                activity_id=activity_id
+            ).values_list("network_id", flat=True)
+        )
+    return _get_index(state, network_ids)
+
+
+def match_network(address):
+    # (network_id, network_name) of the first active network containing
+    # address, or None.
+    return get_network_index().lookup(address)
+
+
+def resolve_networks(ip_addresses):
+    # Map every distinct address to the (network_id, network_name) of the
+    # first active network containing it, or to None.
+    index = get_network_index()
+    networks = {}
+    for address in ip_addresses:
+        if address and address not in networks:
+            networks[address] = index.lookup(address)
+    return networks
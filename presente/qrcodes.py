@@ -0,0 +1,114 @@
+from io import BytesIO
+import base64
+import qrcode
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import reverse
+from .utils import get_checkin_bucket, get_token_codec
+
+BOX_SIZE = 10
+
+
+def _make_qr(data):
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_H,
+        box_size=BOX_SIZE,
+        border=1,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def render_qr_png(data):
+    img = _make_qr(data).make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return f"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode()}"
+
+
+def render_qr_svg(data):
+    # Inline SVG with a single stroked <path>: each horizontal run of dark
+    # modules is one relative "move + horizontal line" command, a fraction
+    # of the size of qrcode's own SvgPathImage (one rectangle per module).
+    matrix = _make_qr(data).get_matrix()
+    size = len(matrix)
+    commands = []
+    x_pos, y_pos = 0, -0.5
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < size and row[x]:
+                x += 1
+            dy = y + 0.5 - y_pos
+            commands.append(f"m{start - x_pos} {dy:g}h{x - start}")
+            x_pos, y_pos = x, y + 0.5
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" '
+        f'width="{size * BOX_SIZE}" height="{size * BOX_SIZE}" '
+        f'shape-rendering="crispEdges" class="img-fluid rounded m-0" '
+        f'role="img" aria-label="QR Code">'
+        f'<path stroke="#000" d="M0 -0.5{"".join(commands)}"/></svg>'
+    )
+
+
+# "client" ships only the check-in URL, the browser draws the QR Code
+QR_RENDERERS = {
+    "png": render_qr_png,
+    "svg": render_qr_svg,
+    "client": None,
+}
+
+
+def get_qr_render_mode():
+    mode = settings.QR_RENDER_MODE
+    if mode not in QR_RENDERERS:
+        raise ImproperlyConfigured(
+            f"QR_RENDER_MODE must be one of {', '.join(QR_RENDERERS)}, not {mode!r}"
+        )
+    return mode
+
+
+def get_checkin_qr(base_url, activity, now):
+    # Token and rendered QR Code for the current window of the activity.
+    # Every display polling during the same window gets the same token, so
+    # the QR Code is rendered once per window and shared through the cache
+    # by all workers. base_url is the scheme and host the display uses.
+    mode = get_qr_render_mode()
+    bucket_start, seconds_left = get_checkin_bucket(
+        activity.qr_timeout, int(now.timestamp())
+    )
+    cache_key = f"presente:qr:{mode}:{activity.pk}:{bucket_start}:{base_url}"
+    payload = cache.get(cache_key)
+    if payload is None:
+        token = get_token_codec().encode_checkin(activity.pk, bucket_start)
+        checkin_url = base_url + reverse("presente:checkin", kwargs={"token": token})
+        renderer = QR_RENDERERS[mode]
+        payload = {
+            "checkin_url": checkin_url,
+            "qr_image": renderer(checkin_url) if renderer else None,
+        }
+        cache.set(cache_key, payload, timeout=seconds_left + 5)
+    return {**payload, "qr_mode": mode, "timeout": seconds_left}
+
+
+def get_activity_qr_context(activity, base_url, now):
+    # Context of presente/includes/qr_content.html, shared by the polling
+    # view and the event stream
+    context = {"activity": activity, "server_time": now.isoformat()}
+
+    # Pre-calculate countdown for not_started activities
+    if activity.status == "not_started":
+        seconds_until_start = int((activity.start_time - now).total_seconds())
+        context["seconds_until_start"] = max(0, seconds_until_start)
+
+    if activity.status == "active":
+        context.update(get_checkin_qr(base_url, activity, now))
+
+    return context
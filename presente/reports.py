@@ -0,0 +1,309 @@
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+import hashlib
+import json
+import os
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections, models
+from django.template.loader import render_to_string
+from django.utils import timezone
+from .filters import ActivityAttendanceFilter
+from .forms import AttendancePrintConfigForm
+from .models import Attendance
+from .networks import resolve_networks
+
+User = get_user_model()
+
+DEFAULT_COLUMNS = ["number", "name", "matricula", "checked_in_at"]
+
+# Rows laid out per document when a report is rendered in chunks. WeasyPrint
+# layout grows faster than linearly with the size of a table, so several
+# smaller documents are cheaper than a single big one, and they can be laid
+# out in parallel.
+CHUNK_ROWS = 1000
+
+# Static part of the report styles (fonts included), shared by every report
+STYLESHEET_PATH = os.path.join(settings.BASE_DIR, "static", "css", "attendance_pdf.css")
+
+# Map sort fields to actual model fields
+SORT_MAPPING = {
+    "name": "user__full_name_normalized",
+    "-name": "-user__full_name_normalized",
+    "type": "user__type",
+    "-type": "-user__type",
+    "curso": "user__curso",
+    "-curso": "-user__curso",
+    "periodo": "user__periodo_referencia",
+    "-periodo": "-user__periodo_referencia",
+    "checked_in_at": "checked_in_at",
+    "-checked_in_at": "-checked_in_at",
+}
+
+
+def get_report_params(query):
+    # Canonical form of an export request (a QueryDict), so that the same
+    # report always gets the same key: filters without empty values,
+    # columns in the order of the form and a known sort.
+    filters = {
+        name: query.get(name)
+        for name in sorted(ActivityAttendanceFilter.base_filters)
+        if query.get(name)
+    }
+    requested = query.getlist("columns")
+    columns = [
+        value
+        for value, _ in AttendancePrintConfigForm.COLUMN_CHOICES
+        if value in requested
+    ]
+    sort_by = query.get("sort_by", "name")
+    if sort_by not in SORT_MAPPING:
+        sort_by = "name"
+    return {
+        "filters": filters,
+        "columns": columns or DEFAULT_COLUMNS,
+        "sort_by": sort_by,
+    }
+
+
+def get_data_version(activity):
+    # Changes whenever the report content may change: attendances added or
+    # removed, the activity edited, or a participant's SUAP data refreshed
+    # (on login, and curso/período by the background job after it).
+    data = Attendance.objects.filter(activity=activity).aggregate(
+        count=models.Count("pk"),
+        last_id=models.Max("pk"),
+        last_login=models.Max("user__last_login"),
+        last_student_data=models.Max("user__student_data_updated_at"),
+    )
+    return [
+        data["count"],
+        data["last_id"],
+        activity.modified_at.isoformat(),
+        data["last_login"].isoformat() if data["last_login"] else None,
+        data["last_student_data"].isoformat() if data["last_student_data"] else None,
+    ]
+
+
+def get_report_key(activity, params):
+    payload = json.dumps(
+        [activity.pk, params, get_data_version(activity)], sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get_report_queryset(activity, params):
+    qs = Attendance.objects.filter(activity=activity).select_related("user")
+    qs = ActivityAttendanceFilter(params["filters"], queryset=qs, activity=activity).qs
+    return qs.order_by(SORT_MAPPING[params["sort_by"]])
+
+
+def get_report_context(activity, params):
+    # Plain values only (no querysets), so chunks can be sent to other
+    # processes without touching the database there
+    context = {"activity": activity, "tags": list(activity.tags.all())}
+
+    rows = list(get_report_queryset(activity, params))
+    # Rows without a stored network (e.g. added in the admin) get their
+    # network name resolved here, in one pass, since chunks may be rendered
+    # in processes without it
+    pending = [row for row in rows if row.network_name is None and row.ip_address]
+    if pending and "ip_address" in params["columns"]:
+        networks = resolve_networks(row.ip_address for row in pending)
+        for row in pending:
+            network = networks.get(row.ip_address)
+            row.network_name = network[1] if network else ""
+    context["columns"] = params["columns"]
+    context["rows"] = rows
+    context["row_offset"] = 0
+    context["total_attendances"] = len(rows)
+    context["sort_by"] = params["sort_by"]
+
+    # Get filter information for display
+    filter_info = []
+    filter_data = params["filters"]
+
+    if filter_data.get("user__full_name"):
+        filter_info.append(f"Nome: {filter_data['user__full_name']}")
+    if filter_data.get("user__matricula"):
+        filter_info.append(f"Matrícula: {filter_data['user__matricula']}")
+    if filter_data.get("user__type"):
+        type_display = dict(User.UserType.choices).get(filter_data["user__type"])
+        filter_info.append(f"Tipo: {type_display}")
+    if filter_data.get("user__curso"):
+        filter_info.append(f"Curso: {filter_data['user__curso']}")
+    if filter_data.get("user__periodo_referencia"):
+        filter_info.append(f"Período: {filter_data['user__periodo_referencia']}")
+
+    context["filter_info"] = filter_info
+    context["generated_at"] = timezone.now()
+
+    # Add absolute paths for WeasyPrint
+    context["logo_path"] = os.path.join(
+        settings.BASE_DIR, "static", "img", "presente-icon.svg"
+    )
+
+    return context
+
+
+class ReportRenderer:
+    # WeasyPrint state kept for the life of a worker process: the font
+    # configuration with the report fonts loaded, the report stylesheet
+    # parsed once, and the local files (logo, fonts) and decoded images
+    # every report uses. Only the template and its small inline @page rules
+    # are parsed per document.
+
+    def __init__(self, stylesheet_path=STYLESHEET_PATH):
+        from weasyprint import CSS
+        from weasyprint.text.fonts import FontConfiguration
+
+        self.files = {}
+        self.image_cache = {}
+        self.font_config = FontConfiguration()
+        # Parsing the stylesheet loads its @font-face rules into font_config
+        self.stylesheet = CSS(
+            filename=stylesheet_path,
+            font_config=self.font_config,
+            url_fetcher=self.fetch,
+        )
+
+    def fetch(self, url, *args, **kwargs):
+        from weasyprint import default_url_fetcher
+
+        # Only local files are kept, remote resources are fetched as usual
+        if not url.startswith("file://"):
+            return default_url_fetcher(url, *args, **kwargs)
+        result = self.files.get(url)
+        if result is None:
+            result = default_url_fetcher(url, *args, **kwargs)
+            file_obj = result.pop("file_obj", None)
+            if file_obj is not None:
+                with file_obj:
+                    result["string"] = file_obj.read()
+            self.files[url] = result
+        return dict(result)
+
+    def render(self, template_name, context):
+        return self.layout(template_name, context).write_pdf()
+
+    def layout(self, template_name, context):
+        # The laid out weasyprint Document, before it is written as a PDF
+        from weasyprint import HTML
+
+        html = render_to_string(template_name, context)
+        document = HTML(
+            string=html, base_url=str(settings.BASE_DIR), url_fetcher=self.fetch
+        )
+        return document.render(
+            stylesheets=[self.stylesheet],
+            font_config=self.font_config,
+            cache=self.image_cache,
+        )
+
+
+_renderer = None
+
+
+def get_renderer():
+    # One renderer per process, built on first use
+    global _renderer
+    if _renderer is None:
+        _renderer = ReportRenderer()
+    return _renderer
+
+
+def render_pdf(template_name, context):
+    return get_renderer().render(template_name, context)
+
+
+def _init_render_process():
+    # Pool children build their own renderer instead of using one
+    # inherited from the parent over fork
+    global _renderer
+    _renderer = None
+    django.setup()
+
+
+def _render_chunk(context):
+    return render_pdf("presente/attendance_pdf.html", context)
+
+
+def render_report_pdf(activity, params, processes=1):
+    context = get_report_context(activity, params)
+    rows = context["rows"]
+    if len(rows) <= CHUNK_ROWS:
+        return _render_chunk(context)
+
+    # Only the first chunk has the report header, every chunk keeps the
+    # table header and continues the row numbering. Page numbers are stamped
+    # after merging, since each chunk would count its own pages.
+    #
+    # Each chunk starts on a new page, so chunks are cut where the pages of
+    # a single document would break. The first chunk is laid out here, its
+    # last (possibly partial) page is dropped and its rows start the next
+    # chunk, which holds a whole number of the pages the first one filled.
+    # Rows of different heights (e.g. wrapped course names) can still end a
+    # chunk on a shorter page.
+    first = get_renderer().layout(
+        "presente/attendance_pdf.html",
+        {**context, "rows": rows[:CHUNK_ROWS], "chunked": True, "row_ids": True},
+    )
+    page_rows = [len(page.anchors) for page in first.pages]
+    # The row ids were only needed to find the page breaks
+    for page in first.pages:
+        page.anchors.clear()
+    rows_per_page = max(page_rows[1:-1] or page_rows)
+    chunk_rows = rows_per_page * max(CHUNK_ROWS // rows_per_page, 1)
+    chunks = [
+        {
+            **context,
+            "rows": rows[start : start + chunk_rows],
+            "row_offset": start,
+            "continuation": True,
+            "chunked": True,
+        }
+        for start in range(sum(page_rows[:-1]), len(rows), chunk_rows)
+    ]
+    if processes > 1:
+        # Children must open their own connections if they ever need one
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=min(processes, len(chunks)),
+            initializer=_init_render_process,
+        ) as pool:
+            documents = list(pool.map(_render_chunk, chunks))
+    else:
+        documents = [_render_chunk(chunk) for chunk in chunks]
+    documents.insert(0, first.copy(first.pages[:-1]).write_pdf())
+    return merge_pdfs(documents, context)
+
+
+def merge_pdfs(documents, context):
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    for document in documents:
+        writer.append(PdfReader(BytesIO(document)))
+
+    page_numbers = PdfReader(
+        BytesIO(
+            render_pdf(
+                "presente/attendance_pdf_page_numbers.html",
+                {**context, "pages": range(len(writer.pages))},
+            )
+        )
+    )
+    for page, number in zip(writer.pages, page_numbers.pages):
+        page.merge_page(number)
+
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def get_report_filename(activity):
+    safe_title = "".join(
+        c if c.isalnum() or c in (" ", "-", "_") else "" for c in activity.title
+    ).replace(" ", "_")
+    return f"presencas_{safe_title}.pdf"
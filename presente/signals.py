@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from .facets import invalidate_activity_facets
+from .models import Activity, Attendance, AttendanceReport, Network
+from .networks import invalidate_network_index
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Network)
+@receiver(post_delete, sender=Network)
+def invalidate_network_index_on_network_change(sender, **kwargs):
+    invalidate_network_index()
+
+
+@receiver(m2m_changed, sender=Activity.allowed_networks.through)
+def invalidate_network_index_on_allowed_networks_change(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_network_index()
+
+
+@receiver(post_save, sender=Attendance)
+def update_activity_on_attendance_save(sender, instance, created, **kwargs):
+    if created:
+        Activity.objects.add_attendances(instance.activity_id, 1)
+        invalidate_activity_facets(instance.activity_id)
+
+
+# Attendance deletes have no receiver on purpose: any post_delete receiver
+# turns off the fast delete of the cascade, so deleting an activity would
+# load and update its attendances one by one. Attendance.delete() and the
+# admin's bulk delete update the counters themselves, and deleting a user
+# recounts the activities the user attended.
+
+
+@receiver(pre_delete, sender=User)
+def collect_attended_activities_on_user_delete(sender, instance, **kwargs):
+    instance._attended_activity_ids = set(
+        Attendance.objects.filter(user=instance).values_list("activity_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=User)
+def recount_attended_activities_on_user_delete(sender, instance, **kwargs):
+    activity_ids = getattr(instance, "_attended_activity_ids", None)
+    if activity_ids:
+        Activity.objects.recount_attendances(pk__in=activity_ids)
+        for activity_id in activity_ids:
+            invalidate_activity_facets(activity_id)
+
+
+@receiver(post_delete, sender=AttendanceReport)
+def delete_report_file(sender, instance, **kwargs):
+    # Also runs for the reports of a deleted activity (cascade), so no PDF
+    # with participant data is left behind. After commit, so a rolled back
+    # delete keeps its file.
+    if instance.file:
+        storage, name = instance.file.storage, instance.file.name
+        transaction.on_commit(lambda: storage.delete(name))
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+from .qrcodes import get_activity_qr_context
+
+logger = logging.getLogger(__name__)
+
+# Longest wait between two reads of the activity, so edits (times,
+# qr_timeout, is_enabled) reach the displays without a reload
+REFRESH_INTERVAL = 30
+
+# Comment line sent while nothing changes, so proxies keep the stream open
+KEEPALIVE_INTERVAL = 15
+
+# Wait before reading the activity again after an error (database down,
+# template error...)
+ERROR_RETRY_DELAY = 5
+
+
+async def iterate_in_thread(iterator):
+    # Async wrapper for a blocking iterator (e.g. one reading the database),
+    # advanced one item at a time in the sync thread
+    iterator = iter(iterator)
+    done = object()
+    while True:
+        item = await sync_to_async(next)(iterator, done)
+        if item is done:
+            break
+        yield item
+
+
+def format_event(event, data):
+    lines = "".join(f"data: {line}\n" for line in data.splitlines())
+    return f"event: {event}\n{lines}\n"
+
+
+class ActivityStream:
+    # One producer per (activity, base_url) in each worker. It reads the
+    # activity, renders the QR fragment when the status or the token changes
+    # and hands the event to the queue of every connected display. Displays
+    # that just connected get a fresh render, so their clock and countdown
+    # are right.
+
+    def __init__(self, activity_id, base_url):
+        self.activity_id = activity_id
+        self.base_url = base_url
+        self.subscribers = set()
+        self.pending = set()
+        self.state = None
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+    def _next_event(self, force):
+        from .models import Activity
+
+        activity = Activity.objects.filter(pk=self.activity_id).first()
+        if activity is None:
+            state = ("missing",)
+            context = {"push": True}
+            delay = REFRESH_INTERVAL
+        else:
+            now = timezone.now()
+            context = {
+                **get_activity_qr_context(activity, self.base_url, now),
+                "push": True,
+            }
+            status = activity.status
+            state = (status, context.get("checkin_url"), activity.modified_at)
+
+            # Sleep until the next transition: start, window rotation or end
+            delays = [REFRESH_INTERVAL]
+            if status == "not_started":
+                delays.append((activity.start_time - now).total_seconds())
+            elif status == "active":
+                delays.append(context["timeout"])
+                delays.append((activity.end_time - now).total_seconds())
+            delay = max(min(delays), 0) + 0.1
+
+        if state == self.state and not force:
+            return state, None, delay
+        html = render_to_string("presente/includes/qr_content.html", context)
+        return state, format_event("qr", html), delay
+
+    def _refresh(self, force):
+        # One cycle in a worker thread. Like a request, it starts and ends
+        # by dropping connections that are unusable or past CONN_MAX_AGE;
+        # after an error the connection is closed, so the retry does not
+        # reuse a broken one.
+        close_old_connections()
+        try:
+            return self._next_event(force)
+        except Exception:
+            connection.close()
+            raise
+        finally:
+            close_old_connections()
+
+    async def run(self):
+        while True:
+            self.wakeup.clear()
+            pending, self.pending = self.pending, set()
+            try:
+                # Not thread sensitive: the producer outlives the request
+                # that started it, so it must not run in that request's
+                # executor thread
+                state, event, delay = await sync_to_async(
+                    self._refresh, thread_sensitive=False
+                )(force=bool(pending))
+            except Exception:
+                # Keep the producer alive: displays get keepalives meanwhile
+                # and the new ones still get their render once it works
+                logger.exception(
+                    "Could not refresh the QR Code stream of activity %s",
+                    self.activity_id,
+                )
+                self.pending |= pending
+                await asyncio.sleep(ERROR_RETRY_DELAY)
+                continue
+            if state != self.state:
+                targets = self.subscribers
+            else:
+                targets = pending & self.subscribers
+            self.state = state
+            if event is not None:
+                for queue in targets:
+                    publish(queue, event)
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def add(self, queue):
+        self.subscribers.add(queue)
+        self.pending.add(queue)
+        self.wakeup.set()
+        if self.task is None or self.task.done():
+            # done: the producer stopped on an unexpected error
+            self.task = asyncio.create_task(self.run())
+
+    def discard(self, queue):
+        self.subscribers.discard(queue)
+        self.pending.discard(queue)
+        if not self.subscribers and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+
+def publish(queue, event):
+    # Displays only need the latest event: a slow client drops the stale one
+    # instead of blocking the producer
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+_streams = {}
+
+
+async def activity_event_stream(activity_id, base_url):
+    key = (activity_id, base_url)
+    stream = _streams.get(key)
+    if stream is None:
+        stream = _streams[key] = ActivityStream(activity_id, base_url)
+
+    queue = asyncio.Queue(maxsize=1)
+    stream.add(queue)
+    try:
+        while True:
+            try:
+                yield await asyncio.wait_for(queue.get(), KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+    finally:
+        stream.discard(queue)
+        if not stream.subscribers:
+            _streams.pop(key, None)
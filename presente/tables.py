@@ -17,7 +17,6 @@ class ActivityTable(CoreTable):
     status = django_tables2.Column(
         verbose_name=_("Status"),
         orderable=True,
-        order_by="status_order",
         empty_values=(),
     )
     tags_list = django_tables2.TemplateColumn(
@@ -37,9 +36,24 @@ class ActivityTable(CoreTable):
         }
         return mark_safe(status_map.get(record.status, ""))
 
+    def order_status(self, queryset, is_descending):
+        # The status depends on the current time, so it is only computed
+        # when the table is sorted by it
+        queryset = queryset.with_status_order().order_by(
+            ("-" if is_descending else "") + "status_order"
+        )
+        return (queryset, True)
+
     class Meta:
         model = Activity
-        fields = ("title", "tags_list", "start_time", "end_time", "status")
+        fields = (
+            "title",
+            "tags_list",
+            "start_time",
+            "end_time",
+            "attendance_count",
+            "status",
+        )
 
 
 class AttendanceTable(django_tables2.Table):
@@ -90,6 +104,11 @@ class ActivityAttendanceTable(django_tables2.Table):
         orderable=True,
         order_by=("user__full_name_normalized", "user__full_name"),
     )
+    user_matricula = django_tables2.Column(
+        accessor="user__matricula",
+        verbose_name=_("Matrícula"),
+        orderable=True,
+    )
     user_type = django_tables2.Column(
         accessor="user__type",
         verbose_name=_("Tipo"),
@@ -120,6 +139,9 @@ class ActivityAttendanceTable(django_tables2.Table):
     def render_user_name(self, record):
         return record.user.get_full_name()
 
+    def render_user_matricula(self, record):
+        return record.user.matricula or "-"
+
     def render_user_curso(self, record):
         return record.user.curso or "-"
 
@@ -130,6 +152,7 @@ class ActivityAttendanceTable(django_tables2.Table):
         model = Attendance
         fields = (
             "user_name",
+            "user_matricula",
             "user_type",
             "user_curso",
             "user_periodo_referencia",
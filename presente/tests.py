@@ -1 +1,344 @@
-# Create your tests here.
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.db import DatabaseError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from taggit.models import Tag
+from .admin import AttendanceAdmin
+from .management.commands.render_reports import Command as RenderReportsCommand
+from .models import Activity, Attendance, AttendanceReport
+from .views import AutocompleteView
+
+User = get_user_model()
+
+
+class ActivityStatusFilterTests(TestCase):
+    STATUSES = ["active", "not_enabled", "not_started", "expired"]
+
+    def setUp(self):
+        self.now = timezone.now()
+        hour = timedelta(hours=1)
+        periods = {
+            "running": (self.now - hour, self.now + hour),
+            "upcoming": (self.now + hour, self.now + 2 * hour),
+            "past": (self.now - 2 * hour, self.now - hour),
+        }
+        self.activities = {}
+        for period, (start_time, end_time) in periods.items():
+            for is_enabled in (True, False):
+                key = (period, is_enabled)
+                self.activities[key] = Activity.objects.create(
+                    title=f"{period} {is_enabled}",
+                    start_time=start_time,
+                    end_time=end_time,
+                    is_enabled=is_enabled,
+                )
+
+    def filtered(self, status):
+        return set(Activity.objects.filter_status(status, now=self.now))
+
+    def test_filter_status(self):
+        expected = {
+            "active": [("running", True)],
+            # Disabled and currently running only: a disabled activity that
+            # has not started or has ended keeps that status, like the badge
+            "not_enabled": [("running", False)],
+            "not_started": [("upcoming", True), ("upcoming", False)],
+            "expired": [("past", True), ("past", False)],
+        }
+        for status, keys in expected.items():
+            with self.subTest(status=status):
+                self.assertEqual(
+                    self.filtered(status), {self.activities[key] for key in keys}
+                )
+
+    def test_filter_status_matches_the_status_property(self):
+        with patch("django.utils.timezone.now", return_value=self.now):
+            for status in self.STATUSES:
+                with self.subTest(status=status):
+                    self.assertEqual(
+                        self.filtered(status),
+                        {
+                            activity
+                            for activity in self.activities.values()
+                            if activity.status == status
+                        },
+                    )
+
+    def test_unknown_status_does_not_filter(self):
+        self.assertEqual(self.filtered(""), set(self.activities.values()))
+
+    @unittest.skipUnless(
+        connection.vendor == "postgresql", "EXPLAIN plans checked on PostgreSQL"
+    )
+    def test_filter_status_uses_an_index(self):
+        indexes = {"activity_status", "activity_end_time", "activity_enabled_period"}
+        with connection.cursor() as cursor:
+            # The test table is too small for the planner to prefer an index
+            # on its own; this only checks that one of them can serve the
+            # filter. TestCase rolls the setting back with its transaction.
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        for status in self.STATUSES:
+            with self.subTest(status=status):
+                plan = Activity.objects.filter_status(status, now=self.now).explain()
+                self.assertTrue(any(index in plan for index in indexes), plan)
+
+
+class CheckInConcurrencyTests(TransactionTestCase):
+    # Real transactions and one connection per thread, like several workers
+    # handling the same QR Code scanned twice
+    THREADS = 8
+
+    def setUp(self):
+        now = timezone.now()
+        self.activity = Activity.objects.create(
+            title="Palestra",
+            start_time=now - timedelta(hours=1),
+            end_time=now + timedelta(hours=1),
+        )
+        self.user = User.objects.create_user(email="aluno@example.com")
+
+    def test_parallel_check_ins_create_a_single_attendance(self):
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+        errors = []
+
+        def check_in():
+            try:
+                barrier.wait()
+                _, created = Attendance.objects.check_in(self.activity, self.user)
+                results.append(created)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=check_in) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(results.count(False), self.THREADS - 1)
+        self.assertEqual(
+            Attendance.objects.filter(activity=self.activity, user=self.user).count(),
+            1,
+        )
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.attendance_count, 1)
+
+
+class CheckInTransactionTests(TestCase):
+    def test_failed_counter_update_rolls_back_the_attendance(self):
+        now = timezone.now()
+        activity = Activity.objects.create(
+            title="Palestra",
+            start_time=now - timedelta(hours=1),
+            end_time=now + timedelta(hours=1),
+        )
+        user = User.objects.create_user(email="aluno@example.com")
+        with patch.object(
+            Activity.objects, "add_attendances", side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                Attendance.objects.check_in(activity, user)
+        self.assertFalse(Attendance.objects.filter(activity=activity).exists())
+        activity.refresh_from_db()
+        self.assertEqual(activity.attendance_count, 0)
+
+
+class AttendanceCountOnDeleteTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.activity = Activity.objects.create(
+            title="Palestra",
+            start_time=now - timedelta(hours=1),
+            end_time=now + timedelta(hours=1),
+        )
+        self.other = Activity.objects.create(
+            title="Oficina",
+            start_time=now - timedelta(hours=1),
+            end_time=now + timedelta(hours=1),
+        )
+        self.users = [
+            User.objects.create_user(email=f"aluno{i}@example.com") for i in range(20)
+        ]
+        for user in self.users:
+            Attendance.objects.check_in(self.activity, user)
+        Attendance.objects.check_in(self.other, self.users[0])
+
+    def assertCount(self, activity, count):
+        activity.refresh_from_db()
+        self.assertEqual(activity.attendance_count, count)
+
+    def test_deleting_an_activity_does_not_load_its_attendances(self):
+        # The attendances are removed by a single fast-delete query,
+        # whatever their number
+        with CaptureQueriesContext(connection) as queries:
+            self.activity.delete()
+        attendance_queries = [
+            query["sql"]
+            for query in queries.captured_queries
+            if '"presente_attendance"' in query["sql"]
+        ]
+        self.assertEqual(len(attendance_queries), 1)
+        self.assertFalse(Attendance.objects.filter(activity_id=self.activity.pk))
+
+    def test_deleting_an_attendance_decrements_the_counter(self):
+        Attendance.objects.get(activity=self.activity, user=self.users[0]).delete()
+        self.assertCount(self.activity, 19)
+        self.assertCount(self.other, 1)
+
+    def test_deleting_a_user_recounts_the_activities_attended(self):
+        self.users[0].delete()
+        self.assertCount(self.activity, 19)
+        self.assertCount(self.other, 0)
+
+    def test_admin_bulk_delete_recounts_the_activities(self):
+        model_admin = AttendanceAdmin(Attendance, admin.site)
+        queryset = Attendance.objects.filter(user__in=self.users[:5])
+        model_admin.delete_queryset(None, queryset)
+        self.assertCount(self.activity, 15)
+        self.assertCount(self.other, 0)
+
+
+class AttendanceReportFileTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+
+    def setUp(self):
+        now = timezone.now()
+        self.activity = Activity.objects.create(
+            title="Palestra",
+            start_time=now - timedelta(hours=1),
+            end_time=now + timedelta(hours=1),
+        )
+        self.user = User.objects.create_user(email="servidor@example.com")
+
+    def create_report(self, key="a"):
+        report = AttendanceReport.objects.create(
+            activity=self.activity, key=key, params={}, requested_by=self.user
+        )
+        report.file.save(f"{self.activity.pk}/{key}.pdf", ContentFile(b"%PDF"))
+        return report
+
+    def test_deleting_an_activity_removes_its_report_files(self):
+        report = self.create_report()
+        storage, name = report.file.storage, report.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.activity.delete()
+        self.assertFalse(storage.exists(name))
+
+    def test_purge_removes_old_report_files(self):
+        report = self.create_report()
+        AttendanceReport.objects.filter(pk=report.pk).update(
+            created_at=timezone.now() - timedelta(days=8),
+            status=AttendanceReport.Status.DONE,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(AttendanceReport.objects.purge(7 * 86400), 1)
+        self.assertFalse(report.file.storage.exists(report.file.name))
+
+    def test_worker_survives_a_report_deleted_while_rendering(self):
+        report = AttendanceReport.objects.request(self.activity, "b", {}, self.user)
+        report = AttendanceReport.objects.claim()
+
+        def render_and_delete(*args, **kwargs):
+            AttendanceReport.objects.filter(pk=report.pk).delete()
+            return b"%PDF"
+
+        with patch(
+            "presente.management.commands.render_reports.render_report_pdf",
+            side_effect=render_and_delete,
+        ):
+            RenderReportsCommand(stdout=StringIO(), stderr=StringIO()).render(
+                report, processes=1
+            )
+        self.assertFalse(report.file)
+        self.assertEqual(
+            os.listdir(
+                os.path.join(settings.MEDIA_ROOT, "reports", str(self.activity.pk))
+            ),
+            [],
+        )
+
+
+class AttendancePanelCursorTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.activity = Activity.objects.create(
+            title="Palestra",
+            start_time=now - timedelta(hours=1),
+            end_time=now + timedelta(hours=1),
+        )
+        admin_user = User.objects.create_superuser(email="admin@example.com")
+        self.client.force_login(admin_user)
+        self.url = reverse(
+            "presente:activity_attendance_panel", kwargs={"pk": self.activity.pk}
+        )
+
+    def test_invalid_cursor_falls_back_to_the_first_page(self):
+        first_page = self.client.get(self.url, {"after": ""})
+        for after, after_id in [
+            ("2024-13-45T00:00:00", "1"),
+            ("2024-01-01T00:00:00", "²"),
+            ("2024-01-01T00:00:00", "abc"),
+            ("garbage", "1"),
+        ]:
+            with self.subTest(after=after, after_id=after_id):
+                response = self.client.get(
+                    self.url, {"after": after, "after_id": after_id}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, first_page.content)
+
+
+class AutocompletePageTests(TestCase):
+    def setUp(self):
+        admin_user = User.objects.create_superuser(email="admin@example.com")
+        self.client.force_login(admin_user)
+        self.url = reverse("presente:autocomplete_tags")
+        for i in range(25):
+            Tag.objects.create(name=f"Tag {i:02}")
+
+    def test_invalid_page_falls_back_to_the_first_page(self):
+        first_page = self.client.get(self.url).json()
+        self.assertEqual(len(first_page["results"]), 20)
+        self.assertTrue(first_page["has_more"])
+        for page in ["²", "abc", "0", "-3"]:
+            with self.subTest(page=page):
+                response = self.client.get(self.url, {"page": page})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), first_page)
+
+    def test_second_page(self):
+        data = self.client.get(self.url, {"page": "2"}).json()
+        self.assertEqual(
+            [result["name"] for result in data["results"]],
+            [f"Tag {i:02}" for i in range(20, 25)],
+        )
+        self.assertFalse(data["has_more"])
+
+    def test_subclass_without_queryset_is_improperly_configured(self):
+        view = AutocompleteView()
+        with self.assertRaises(ImproperlyConfigured):
+            view.get_queryset("")
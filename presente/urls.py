@@ -29,6 +29,11 @@ urlpatterns = [
         views.ActivityAttendanceListView.as_view(),
         name="activity_attendances",
     ),
+    path(
+        "activity/<int:pk>/attendances/panel/",
+        views.ActivityAttendancePanelView.as_view(),
+        name="activity_attendance_panel",
+    ),
     path(
         "activity/<int:pk>/attendances/export/config/",
         views.ActivityAttendanceExportConfigView.as_view(),
@@ -39,11 +44,31 @@ urlpatterns = [
         views.ActivityAttendancePDFView.as_view(),
         name="activity_attendance_pdf",
     ),
+    path(
+        "reports/<int:pk>/",
+        views.AttendanceReportStatusView.as_view(),
+        name="report_status",
+    ),
+    path(
+        "reports/<int:pk>/file/",
+        views.AttendanceReportFileView.as_view(),
+        name="report_file",
+    ),
     path(
         "activity/<int:pk>/attendances/csv/",
         views.ActivityAttendanceCSVExportView.as_view(),
         name="activity_attendance_csv",
     ),
+    path(
+        "autocomplete/users/",
+        views.UserAutocompleteView.as_view(),
+        name="autocomplete_users",
+    ),
+    path(
+        "autocomplete/tags/",
+        views.TagAutocompleteView.as_view(),
+        name="autocomplete_tags",
+    ),
     path(
         "activity/<int:activity_pk>/attendance/<int:pk>/delete/",
         views.AttendanceDeleteView.as_view(),
@@ -74,5 +99,10 @@ urlpatterns = [
     path(
         "a/<str:encoded_id>/qr/", views.ActivityQRCodeView.as_view(), name="activity_qr"
     ),
+    path(
+        "a/<str:encoded_id>/events/",
+        views.ActivityEventsView.as_view(),
+        name="activity_events",
+    ),
     path("checkin/<str:token>/", views.CheckInView.as_view(), name="checkin"),
 ]
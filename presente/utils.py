@@ -1,9 +1,17 @@
 from django.conf import settings
+from typing import NamedTuple
 import hashlib
+import hmac
 import base64
+import binascii
 import time
 
 
+# Check-in tokens are never accepted after this many seconds, whatever the
+# activity's qr_timeout (0 means the QR Code is not rotated faster than this).
+CHECKIN_TOKEN_MAX_AGE = 300
+
+
 def get_client_ip(request):
     x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
     if x_forwarded_for:
@@ -14,107 +22,132 @@ def get_client_ip(request):
     return ip
 
 
-def encode_activity_id(activity_id):
-    # Create a hash using the activity ID and secret key
-    message = f"{activity_id}:activity-public"
-    hash_obj = hashlib.blake2b(
-        message.encode(), key=settings.SECRET_KEY.encode()[:32], digest_size=16
-    )
-    # Convert to URL-safe base64
-    hash_bytes = hash_obj.digest()
-    # encoded = base64.urlsafe_b64encode(hash_bytes).decode().rstrip("=")
-    # Store mapping: hash -> id (we'll need to store this)
-    # For now, we'll use a reversible encoding with the ID embedded
-    # Format: base64(id_bytes + hash_bytes)
-    id_bytes = activity_id.to_bytes(8, byteorder="big")
-    combined = id_bytes + hash_bytes
-    result = base64.urlsafe_b64encode(combined).decode().rstrip("=")
-    return result
+def get_base_url(request):
+    # Scheme and host the client used, e.g. "https://presente.ifrn.edu.br"
+    return f"{request.scheme}://{request.get_host()}"
 
 
-def decode_activity_id(encoded_id):
-    try:
-        # Add padding back if needed
-        padding = 4 - (len(encoded_id) % 4)
-        if padding != 4:
-            encoded_id += "=" * padding
+class CheckinToken(NamedTuple):
+    activity_id: int
+    timestamp: int
+    valid: bool
+    age: int
 
-        # Decode from base64
-        combined = base64.urlsafe_b64decode(encoded_id)
+    def is_fresh(self, timeout_seconds):
+        return self.valid and self.age <= timeout_seconds
 
-        # Extract ID (first 8 bytes) and hash (remaining bytes)
-        id_bytes = combined[:8]
-        hash_bytes = combined[8:]
 
-        activity_id = int.from_bytes(id_bytes, byteorder="big")
+class CheckinTokenCodec:
+    # Public activity ids:  base64(id (8 bytes) + hash (16 bytes))
+    # Check-in tokens:      base64(id (8 bytes) + timestamp (8 bytes) + hash (16 bytes))
+    # The hash is a BLAKE2b keyed with the first 32 bytes of the secret key.
+    # The keyed hasher is built once and copied for every message.
 
-        # Verify the hash
-        message = f"{activity_id}:activity-public"
-        expected_hash = hashlib.blake2b(
-            message.encode(), key=settings.SECRET_KEY.encode()[:32], digest_size=16
-        ).digest()
+    digest_size = 16
 
-        if hash_bytes != expected_hash:
-            return None
+    def __init__(self, secret_key):
+        self.secret_key = secret_key
+        self._hasher = hashlib.blake2b(
+            key=secret_key.encode()[:32], digest_size=self.digest_size
+        )
 
-        return activity_id
-    except (ValueError, Exception):
-        return None
+    def _sign(self, message):
+        hasher = self._hasher.copy()
+        hasher.update(message.encode())
+        return hasher.digest()
+
+    @staticmethod
+    def _b64encode(data):
+        return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+    @staticmethod
+    def _b64decode(encoded):
+        # Add padding back if needed
+        return base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
 
+    def encode_activity_id(self, activity_id):
+        hash_bytes = self._sign(f"{activity_id}:activity-public")
+        return self._b64encode(activity_id.to_bytes(8, byteorder="big") + hash_bytes)
 
-def generate_checkin_token(activity_id, timeout_seconds):
-    # Get current timestamp
-    timestamp = int(time.time())
+    def decode_activity_id(self, encoded_id):
+        try:
+            combined = self._b64decode(encoded_id)
+        except (ValueError, binascii.Error):
+            return None
+        if len(combined) != 8 + self.digest_size:
+            return None
 
-    # Create message with activity ID and timestamp
-    message = f"{activity_id}:{timestamp}:activity-checkin"
-    hash_obj = hashlib.blake2b(
-        message.encode(), key=settings.SECRET_KEY.encode()[:32], digest_size=16
-    )
-    hash_bytes = hash_obj.digest()
+        activity_id = int.from_bytes(combined[:8], byteorder="big")
+        expected_hash = self._sign(f"{activity_id}:activity-public")
+        if not hmac.compare_digest(combined[8:], expected_hash):
+            return None
+        return activity_id
 
-    # Format: activity_id (8 bytes) + timestamp (8 bytes) + hash (16 bytes)
-    id_bytes = activity_id.to_bytes(8, byteorder="big")
-    timestamp_bytes = timestamp.to_bytes(8, byteorder="big")
-    combined = id_bytes + timestamp_bytes + hash_bytes
+    def encode_checkin(self, activity_id, timestamp=None):
+        if timestamp is None:
+            timestamp = int(time.time())
+        hash_bytes = self._sign(f"{activity_id}:{timestamp}:activity-checkin")
+        return self._b64encode(
+            activity_id.to_bytes(8, byteorder="big")
+            + timestamp.to_bytes(8, byteorder="big")
+            + hash_bytes
+        )
+
+    def decode_checkin(self, token, now=None):
+        # Decode and verify a check-in token once. Malformed tokens decode to
+        # an invalid result, so callers only have to look at ``valid``/``age``.
+        if now is None:
+            now = int(time.time())
+        try:
+            combined = self._b64decode(token)
+        except (ValueError, binascii.Error):
+            return CheckinToken(None, None, False, None)
+        if len(combined) != 16 + self.digest_size:
+            return CheckinToken(None, None, False, None)
+
+        activity_id = int.from_bytes(combined[:8], byteorder="big")
+        timestamp = int.from_bytes(combined[8:16], byteorder="big")
+        expected_hash = self._sign(f"{activity_id}:{timestamp}:activity-checkin")
+        valid = hmac.compare_digest(combined[16:], expected_hash)
+        return CheckinToken(activity_id, timestamp, valid, now - timestamp)
+
+
+_codec = None
+
+
+def get_token_codec():
+    # Rebuilt only if the secret key changes (e.g. in tests)
+    global _codec
+    if _codec is None or _codec.secret_key != settings.SECRET_KEY:
+        _codec = CheckinTokenCodec(settings.SECRET_KEY)
+    return _codec
 
-    # Encode to URL-safe base64
-    result = base64.urlsafe_b64encode(combined).decode().rstrip("=")
-    return result
 
+def encode_activity_id(activity_id):
+    return get_token_codec().encode_activity_id(activity_id)
 
-def verify_checkin_token(token, timeout_seconds):
-    try:
-        # Add padding back if needed
-        padding = 4 - (len(token) % 4)
-        if padding != 4:
-            token += "=" * padding
 
-        # Decode from base64
-        combined = base64.urlsafe_b64decode(token)
+def decode_activity_id(encoded_id):
+    return get_token_codec().decode_activity_id(encoded_id)
 
-        # Extract components
-        id_bytes = combined[:8]
-        timestamp_bytes = combined[8:16]
-        hash_bytes = combined[16:]
 
-        activity_id = int.from_bytes(id_bytes, byteorder="big")
-        timestamp = int.from_bytes(timestamp_bytes, byteorder="big")
+def get_checkin_window(timeout_seconds):
+    # Length in seconds of each QR Code window for a given qr_timeout
+    if timeout_seconds <= 0:
+        return CHECKIN_TOKEN_MAX_AGE
+    return min(timeout_seconds, CHECKIN_TOKEN_MAX_AGE)
 
-        # Check if token has expired
-        current_time = int(time.time())
-        if current_time - timestamp > timeout_seconds:
-            return None
 
-        # Verify the hash
-        message = f"{activity_id}:{timestamp}:activity-checkin"
-        expected_hash = hashlib.blake2b(
-            message.encode(), key=settings.SECRET_KEY.encode()[:32], digest_size=16
-        ).digest()
+def get_checkin_bucket(timeout_seconds, now=None):
+    # Tokens are stamped with the start of the current window,
+    # floor(now / window) * window, so every display polling during the
+    # same window shows the same token. Returns (bucket_start, seconds left).
+    if now is None:
+        now = int(time.time())
+    window = get_checkin_window(timeout_seconds)
+    bucket_start = now - now % window
+    return bucket_start, bucket_start + window - now
 
-        if hash_bytes != expected_hash:
-            return None
 
-        return activity_id
-    except (ValueError, Exception):
-        return None
+def decode_checkin_token(token):
+    return get_token_codec().decode_checkin(token)
@@ -1,13 +1,18 @@
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.views.generic.base import TemplateView
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.views.generic.base import TemplateView, View
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.shortcuts import get_object_or_404, redirect
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.http import urlencode
+from django.db.models import Q
+from django.core.exceptions import ImproperlyConfigured
 from django.http import Http404
+from django.core.handlers.asgi import ASGIRequest
 from django.urls import reverse, reverse_lazy
+from django_htmx.http import HttpResponseClientRedirect
 from django_filters.views import FilterView
-from django_weasyprint import WeasyTemplateResponseMixin
 from core.mixins import PageTitleMixin, SuperuserRequiredMixin
 from core.views import (
     CoreListView,
@@ -17,15 +22,19 @@ from core.views import (
     CoreDeleteView,
     CoreFilterView,
 )
-import qrcode
-import qrcode.image.svg
-from io import BytesIO
-import base64
-import os
+import io
 import csv
 from django.conf import settings
-from django.http import HttpResponse
-from .models import Activity, Attendance, Network
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from taggit.models import Tag
+from users.models import normalize_name
+from .models import (
+    Activity,
+    Attendance,
+    AttendanceReport,
+    Network,
+    PendingAttendance,
+)
 from .tables import (
     ActivityTable,
     AttendanceTable,
@@ -35,12 +44,18 @@ from .tables import (
 from .forms import ActivityForm, AttendancePrintConfigForm, NetworkForm
 from .filters import ActivityFilter, AttendanceFilter, ActivityAttendanceFilter
 from .mixins import ActivityOwnerMixin
+from .networks import match_network
+from .reports import get_report_filename, get_report_key, get_report_params
+from .qrcodes import get_activity_qr_context, get_qr_render_mode
+from .streams import activity_event_stream, iterate_in_thread
 from .utils import (
+    get_base_url,
     get_client_ip,
     encode_activity_id,
     decode_activity_id,
-    generate_checkin_token,
-    verify_checkin_token,
+    decode_checkin_token,
+    get_checkin_window,
+    CHECKIN_TOKEN_MAX_AGE,
 )
 
 User = get_user_model()
@@ -52,6 +67,7 @@ class IndexView(LoginRequiredMixin, PageTitleMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        PendingAttendance.objects.read_through(user=self.request.user)
         if self.request.user.is_superuser:
             context["activities"] = Activity.objects.count()
         else:
@@ -130,8 +146,7 @@ class ActivityDetailView(CoreDetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["attendances"] = self.object.attendances.select_related("user").all()
-        context["attendance_count"] = self.object.attendances.count()
+        context["attendance_count"] = self.object.attendance_count
         context["encoded_id"] = encode_activity_id(self.object.id)
         return context
 
@@ -177,6 +192,8 @@ class PublicActivityView(TemplateView):
 
         context["activity"] = activity
         context["encoded_id"] = encoded_id
+        context["qr_mode"] = get_qr_render_mode()
+        context["qr_push"] = settings.QR_PUSH_ENABLED
 
         return context
 
@@ -195,44 +212,29 @@ class ActivityQRCodeView(TemplateView):
         activity_id = decode_activity_id(encoded_id)
         if activity_id:
             activity = get_object_or_404(Activity, id=activity_id)
-            context["activity"] = activity
+            context.update(
+                get_activity_qr_context(activity, get_base_url(self.request), now)
+            )
 
-            # Pre-calculate countdown for not_started activities
-            if activity.status == "not_started":
-                seconds_until_start = int((activity.start_time - now).total_seconds())
-                context["seconds_until_start"] = max(0, seconds_until_start)
+        return context
 
-            if activity.status == "active":
-                checkin_token = generate_checkin_token(activity.id, activity.qr_timeout)
-                checkin_path = reverse(
-                    "presente:checkin", kwargs={"token": checkin_token}
-                )
-                checkin_url = self.request.build_absolute_uri(checkin_path)
-
-                # Generate QR code server-side
-                qr = qrcode.QRCode(
-                    version=1,
-                    error_correction=qrcode.constants.ERROR_CORRECT_H,
-                    box_size=10,
-                    border=1,
-                )
-                qr.add_data(checkin_url)
-                qr.make(fit=True)
 
-                img = qr.make_image(fill_color="black", back_color="white")
-                buffer = BytesIO()
-                img.save(buffer, format="PNG")
-                qr_data_url = f"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode()}"
+class ActivityEventsView(View):
+    # Server-Sent Events with the QR fragment of an activity, pushed when the
+    # token rotates or the status changes. Needs an ASGI server.
 
-                context.update(
-                    {
-                        "checkin_url": checkin_url,
-                        "qr_data_url": qr_data_url,
-                        "timeout": activity.qr_timeout,
-                    }
-                )
+    async def get(self, request, encoded_id):
+        activity_id = decode_activity_id(encoded_id)
+        if not activity_id:
+            raise Http404("Activity not found")
 
-        return context
+        response = StreamingHttpResponse(
+            activity_event_stream(activity_id, get_base_url(request)),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
 
 
 class CheckInView(LoginRequiredMixin, TemplateView):
@@ -243,12 +245,15 @@ class CheckInView(LoginRequiredMixin, TemplateView):
         token = kwargs.get("token")
         context["success"] = False
 
-        activity_id = verify_checkin_token(token, 300)
+        checkin_token = decode_checkin_token(token)
 
-        if not activity_id:
+        if (
+            not checkin_token.is_fresh(CHECKIN_TOKEN_MAX_AGE)
+            or not checkin_token.activity_id
+        ):
             context["error"] = _("QR Code inválido ou expirado.")
         else:
-            activity = get_object_or_404(Activity, id=activity_id)
+            activity = get_object_or_404(Activity, id=checkin_token.activity_id)
             client_ip = get_client_ip(self.request)
 
             context["activity"] = activity
@@ -269,13 +274,34 @@ class CheckInView(LoginRequiredMixin, TemplateView):
                 )
             elif activity.status == "not_enabled":
                 context["error"] = _("Esta atividade não está aceitando presenças.")
-            elif not verify_checkin_token(token, activity.qr_timeout):
+            elif not checkin_token.is_fresh(get_checkin_window(activity.qr_timeout)):
                 context["error"] = _("QR Code expirado. Solicite um novo código.")
-            else:
-                attendance, created = Attendance.objects.get_or_create(
+            elif settings.CHECKIN_BUFFER_ENABLED:
+                # Accept now, write to Attendance later (flush_checkins)
+                network_id, network_name = match_network(client_ip) or (None, "")
+                attendance = PendingAttendance.objects.create(
                     activity=activity,
                     user=self.request.user,
-                    defaults={"ip_address": client_ip},
+                    ip_address=client_ip,
+                    network_id=network_id,
+                    network_name=network_name,
+                )
+
+                context.update(
+                    {
+                        "success": True,
+                        "attendance": attendance,
+                        "pending": True,
+                    }
+                )
+            else:
+                network_id, network_name = match_network(client_ip) or (None, "")
+                attendance, created = Attendance.objects.check_in(
+                    activity,
+                    self.request.user,
+                    ip_address=client_ip,
+                    network_id=network_id,
+                    network_name=network_name,
                 )
 
                 context.update(
@@ -298,6 +324,10 @@ class MyAttendancesView(CoreFilterView):
     actions = []
     permission_required = []
 
+    def get(self, request, *args, **kwargs):
+        PendingAttendance.objects.read_through(user=request.user)
+        return super().get(request, *args, **kwargs)
+
     def get_queryset(self):
         return (
             Attendance.objects.filter(user=self.request.user)
@@ -317,6 +347,10 @@ class ActivityAttendanceListView(ActivityOwnerMixin, CoreFilterView):
     actions = ["delete"]
     permission_required = []
 
+    def get(self, request, *args, **kwargs):
+        PendingAttendance.objects.read_through(activity_id=self.kwargs["pk"])
+        return super().get(request, *args, **kwargs)
+
     def get_page_title(self):
         activity = self.get_activity()
         return _("Presenças - {}").format(activity.title)
@@ -326,11 +360,16 @@ class ActivityAttendanceListView(ActivityOwnerMixin, CoreFilterView):
         qs = Attendance.objects.filter(activity=activity).select_related("user")
         return qs.order_by("-checked_in_at")
 
+    def get_filterset_kwargs(self, filterset_class):
+        kwargs = super().get_filterset_kwargs(filterset_class)
+        kwargs["activity"] = self.get_activity()
+        return kwargs
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         activity = self.get_activity()
         context["activity"] = activity
-        context["total_attendances"] = self.get_queryset().count()
+        context["total_attendances"] = activity.attendance_count
         return context
 
     def get_allowed_actions(self):
@@ -339,6 +378,123 @@ class ActivityAttendanceListView(ActivityOwnerMixin, CoreFilterView):
         return allowed_actions
 
 
+class ActivityAttendancePanelView(ActivityOwnerMixin, LoginRequiredMixin, TemplateView):
+    # Latest attendances of the activity, loaded on demand by the detail
+    # page. Keyset pagination on (checked_in_at, pk): each page reads
+    # page_size rows from the index wherever it starts, unlike OFFSET.
+    page_size = 20
+
+    def get_template_names(self):
+        if "after" in self.request.GET:
+            return ["presente/includes/attendance_panel_rows.html"]
+        return ["presente/includes/attendance_panel.html"]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        activity = self.get_activity()
+        qs = activity.attendances.select_related("user").order_by(
+            "-checked_in_at", "-pk"
+        )
+
+        # An invalid cursor (impossible date, non-numeric id) is the same as
+        # no cursor: the first page
+        try:
+            after = parse_datetime(self.request.GET.get("after", ""))
+            after_id = int(self.request.GET.get("after_id", ""))
+        except ValueError:
+            after = None
+        if after is not None:
+            qs = qs.filter(
+                Q(checked_in_at__lt=after) | Q(checked_in_at=after, pk__lt=after_id)
+            )
+
+        attendances = list(qs[: self.page_size + 1])
+        context["activity"] = activity
+        context["attendances"] = attendances[: self.page_size]
+        if len(attendances) > self.page_size:
+            last = attendances[self.page_size - 1]
+            context["next_page"] = urlencode(
+                {"after": last.checked_in_at.isoformat(), "after_id": last.pk}
+            )
+        return context
+
+
+class AutocompleteView(LoginRequiredMixin, View):
+    # Paged JSON search for the TomSelect widgets (see presente.widgets):
+    # ?q=<text>&page=<n> -> {"results": [...], "has_more": bool}
+    # Subclasses set an ordered queryset and result_fields ({JSON key:
+    # attribute or method of each object}), and narrow the queryset down by
+    # the search text in search().
+    queryset = None
+    result_fields = None
+    paginate_by = 20
+
+    def get_queryset(self, query):
+        if self.queryset is None or self.result_fields is None:
+            raise ImproperlyConfigured(
+                f"{type(self).__name__} requires 'queryset' and 'result_fields'."
+            )
+        return self.search(self.queryset.all(), query)
+
+    def search(self, queryset, query):
+        return queryset
+
+    def get_result(self, obj):
+        result = {}
+        for key, name in self.result_fields.items():
+            value = getattr(obj, name)
+            result[key] = value() if callable(value) else value
+        return result
+
+    def get_page(self):
+        # Anything but a positive integer is the first page
+        try:
+            page = int(self.request.GET.get("page", ""))
+        except ValueError:
+            return 1
+        return max(page, 1)
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get("q", "").strip()
+        offset = (self.get_page() - 1) * self.paginate_by
+        objects = list(self.get_queryset(query)[offset : offset + self.paginate_by + 1])
+        return JsonResponse(
+            {
+                "results": [
+                    self.get_result(obj) for obj in objects[: self.paginate_by]
+                ],
+                "has_more": len(objects) > self.paginate_by,
+            }
+        )
+
+
+class UserAutocompleteView(PermissionRequiredMixin, AutocompleteView):
+    # Candidate owners for ActivityForm
+    permission_required = "presente.add_activity"
+    queryset = User.objects.filter(type="SERVIDOR").order_by(
+        "full_name_normalized", "email"
+    )
+    result_fields = {"id": "pk", "text": "get_full_name"}
+
+    def search(self, queryset, query):
+        if "@" in query:
+            return queryset.filter(email__istartswith=query)
+        if query:
+            # Served by the trigram index on PostgreSQL
+            return queryset.filter(full_name_normalized__contains=normalize_name(query))
+        return queryset
+
+
+class TagAutocompleteView(AutocompleteView):
+    queryset = Tag.objects.order_by("name")
+    result_fields = {"id": "pk", "name": "name"}
+
+    def search(self, queryset, query):
+        if query:
+            return queryset.filter(name__icontains=query)
+        return queryset
+
+
 class AttendanceDeleteView(CoreDeleteView):
     model = Attendance
     success_message = _("Presença removida com sucesso!")
@@ -392,125 +548,72 @@ class ActivityAttendanceExportConfigView(
         return context
 
 
-class ActivityAttendancePDFView(
-    WeasyTemplateResponseMixin,
-    ActivityOwnerMixin,
-    LoginRequiredMixin,
-    FilterView,
-):
-    model = Attendance
-    filterset_class = ActivityAttendanceFilter
-    template_name = "presente/attendance_pdf.html"
-    context_object_name = "attendances"
-    pdf_filename = "relatorio_presencas.pdf"
-    pdf_attachment = False  # Display inline in browser instead of downloading
+class ActivityAttendancePDFView(ActivityOwnerMixin, LoginRequiredMixin, View):
+    # PDF reports are rendered by the render_reports worker. An identical
+    # report (same filters, columns, sort and data) is served from the
+    # stored file, otherwise the request waits on the report status page.
 
-    def get_pdf_filename(self):
+    def get(self, request, *args, **kwargs):
         activity = self.get_activity()
-        safe_title = "".join(
-            c if c.isalnum() or c in (" ", "-", "_") else "" for c in activity.title
-        ).replace(" ", "_")
-        return f"presencas_{safe_title}.pdf"
+        PendingAttendance.objects.read_through(activity=activity)
 
-    def get_queryset(self):
-        activity = self.get_activity()
+        params = get_report_params(request.GET)
+        report = AttendanceReport.objects.request(
+            activity, get_report_key(activity, params), params, request.user
+        )
+        if report.status == AttendanceReport.Status.DONE:
+            return redirect("presente:report_file", pk=report.pk)
+        return redirect("presente:report_status", pk=report.pk)
 
-        # Get base queryset
-        qs = Attendance.objects.filter(activity=activity).select_related("user")
 
-        # Apply sorting from configuration
-        sort_by = self.request.GET.get("sort_by", "name")
-        if sort_by:
-            # Map sort fields to actual model fields
-            sort_mapping = {
-                "name": "user__full_name_normalized",
-                "-name": "-user__full_name_normalized",
-                "type": "user__type",
-                "-type": "-user__type",
-                "curso": "user__curso",
-                "-curso": "-user__curso",
-                "periodo": "user__periodo_referencia",
-                "-periodo": "-user__periodo_referencia",
-                "checked_in_at": "checked_in_at",
-                "-checked_in_at": "-checked_in_at",
-            }
-            sort_field = sort_mapping.get(sort_by, "user__full_name_normalized")
-            qs = qs.order_by(sort_field)
-        else:
-            qs = qs.order_by("user__full_name_normalized")
+class AttendanceReportMixin(LoginRequiredMixin):
+    def get_report(self):
+        report = get_object_or_404(
+            AttendanceReport.objects.select_related("activity"), pk=self.kwargs["pk"]
+        )
+        if (
+            not self.request.user.is_superuser
+            and not report.activity.owners.filter(pk=self.request.user.pk).exists()
+        ):
+            raise Http404("Você não tem permissão para acessar este relatório")
+        return report
 
-        return qs
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        activity = self.get_activity()
-        context["activity"] = activity
+class AttendanceReportStatusView(AttendanceReportMixin, PageTitleMixin, TemplateView):
+    page_title = _("Relatório de Presenças")
 
-        # Get the filtered queryset (after filters are applied) and apply sorting
-        sort_by = self.request.GET.get("sort_by", "name")
-        sort_mapping = {
-            "name": "user__full_name_normalized",
-            "-name": "-user__full_name_normalized",
-            "type": "user__type",
-            "-type": "-user__type",
-            "curso": "user__curso",
-            "-curso": "-user__curso",
-            "periodo": "user__periodo_referencia",
-            "-periodo": "-user__periodo_referencia",
-            "checked_in_at": "checked_in_at",
-            "-checked_in_at": "-checked_in_at",
-        }
-        sort_field = sort_mapping.get(sort_by, "user__full_name_normalized")
+    def get_template_names(self):
+        if self.request.htmx:
+            return ["presente/includes/report_status.html"]
+        return ["presente/report_status.html"]
 
-        # Apply sorting to the filtered queryset
-        filtered_qs = context["filter"].qs.order_by(sort_field)
+    def get(self, request, *args, **kwargs):
+        report = self.get_report()
+        if request.htmx and report.status == AttendanceReport.Status.DONE:
+            return HttpResponseClientRedirect(
+                reverse("presente:report_file", kwargs={"pk": report.pk})
+            )
+        return super().get(request, *args, **kwargs)
 
-        # Store the sorted queryset for the template
-        context["sorted_qs"] = filtered_qs
-        context["total_attendances"] = filtered_qs.count()
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        report = self.get_report()
+        context["report"] = report
+        context["activity"] = report.activity
+        return context
 
-        # Get column configuration
-        columns = self.request.GET.getlist("columns")
-        if not columns:
-            columns = ["number", "name", "matricula", "checked_in_at"]
-        context["columns"] = columns
-
-        # Get sort configuration
-        context["sort_by"] = self.request.GET.get("sort_by", "name")
-
-        # Get filter information for display
-        filter_info = []
-        filter_data = self.request.GET
-
-        if filter_data.get("user__full_name"):
-            filter_info.append(f"Nome: {filter_data['user__full_name']}")
-        if filter_data.get("user__type"):
-            type_display = dict(User.UserType.choices).get(filter_data["user__type"])
-            filter_info.append(f"Tipo: {type_display}")
-        if filter_data.get("user__curso"):
-            filter_info.append(f"Curso: {filter_data['user__curso']}")
-        if filter_data.get("user__periodo_referencia"):
-            filter_info.append(f"Período: {filter_data['user__periodo_referencia']}")
-
-        context["filter_info"] = filter_info
-        context["generated_at"] = timezone.now()
-
-        # Add absolute paths for WeasyPrint
-        logo_path = os.path.join(
-            settings.BASE_DIR, "static", "img", "presente-icon.svg"
-        )
-        context["logo_path"] = logo_path
 
-        # Add font paths
-        context["source_sans_regular_path"] = os.path.join(
-            settings.BASE_DIR, "static", "fonts", "SourceSans3-Regular.ttf"
-        )
-        context["source_sans_bold_path"] = os.path.join(
-            settings.BASE_DIR, "static", "fonts", "SourceSans3-Bold.ttf"
+class AttendanceReportFileView(AttendanceReportMixin, View):
+    def get(self, request, *args, **kwargs):
+        report = self.get_report()
+        if report.status != AttendanceReport.Status.DONE or not report.file:
+            return redirect("presente:report_status", pk=report.pk)
+        return FileResponse(
+            report.file.open("rb"),
+            content_type="application/pdf",
+            filename=get_report_filename(report.activity),
         )
 
-        return context
-
 
 class ActivityAttendanceCSVExportView(
     ActivityOwnerMixin,
@@ -545,7 +648,10 @@ class ActivityAttendanceCSVExportView(
 
     def get(self, request, *args, **kwargs):
         activity = self.get_activity()
-        filterset = self.filterset_class(request.GET, queryset=self.get_queryset())
+        PendingAttendance.objects.read_through(activity=activity)
+        filterset = self.filterset_class(
+            request.GET, queryset=self.get_queryset(), activity=activity
+        )
         queryset = filterset.qs
 
         # Reapply sorting to ensure it's maintained after filtering
@@ -576,11 +682,21 @@ class ActivityAttendanceCSVExportView(
         ).replace(" ", "_")
         filename = f"presencas_{safe_title}.csv"
 
-        # Create CSV response
-        response = HttpResponse(content_type="text/csv; charset=utf-8-sig")
+        # Stream the CSV while rows are read, so memory stays constant and
+        # the first bytes go out right away. Under ASGI a sync iterator would
+        # be buffered whole, so it is consumed from a thread instead.
+        chunks = self.iter_csv(queryset, columns)
+        if isinstance(request, ASGIRequest):
+            chunks = iterate_in_thread(chunks)
+        response = StreamingHttpResponse(
+            chunks, content_type="text/csv; charset=utf-8-sig"
+        )
         response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
 
-        writer = csv.writer(response)
+    def iter_csv(self, queryset, columns, chunk_size=2000):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
 
         # Write header row
         header = []
@@ -604,32 +720,73 @@ class ActivityAttendanceCSVExportView(
             header.append("Rede")
 
         writer.writerow(header)
-
-        # Write data rows
-        for idx, attendance in enumerate(queryset, 1):
+        # Byte order mark once, so Excel reads the file as UTF-8
+        yield ("\ufeff" + buffer.getvalue()).encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+        # Write data rows straight from the database values, without
+        # building User/Attendance instances
+        type_labels = dict(User.UserType.choices)
+        rows = queryset.values_list(
+            "user__full_name",
+            "user__first_name",
+            "user__last_name",
+            "user__email",
+            "user__matricula",
+            "user__type",
+            "user__curso",
+            "user__periodo_referencia",
+            "checked_in_at",
+            "network_name",
+            "ip_address",
+        ).iterator(chunk_size=chunk_size)
+        for idx, (
+            full_name,
+            first_name,
+            last_name,
+            email,
+            matricula,
+            user_type,
+            curso,
+            periodo,
+            checked_in_at,
+            network_name,
+            ip_address,
+        ) in enumerate(rows, 1):
             row = []
             if "number" in columns:
                 row.append(idx)
             if "name" in columns:
-                row.append(attendance.user.get_full_name().upper())
+                # Same fallback as User.get_full_name()
+                name = full_name or f"{first_name} {last_name}".strip() or email
+                row.append(name.upper())
             if "email" in columns:
-                row.append(attendance.user.email or "-")
+                row.append(email or "-")
             if "matricula" in columns:
-                row.append(attendance.user.matricula or "-")
+                row.append(matricula or "-")
             if "type" in columns:
-                row.append(attendance.user.get_type_display())
+                row.append(type_labels.get(user_type, user_type))
             if "curso" in columns:
-                row.append(attendance.user.curso or "-")
+                row.append(curso or "-")
             if "periodo" in columns:
-                row.append(attendance.user.periodo_referencia or "-")
+                row.append(periodo or "-")
             if "checked_in_at" in columns:
-                row.append(attendance.checked_in_at.strftime("%d/%m/%Y %H:%M:%S"))
+                row.append(checked_in_at.strftime("%d/%m/%Y %H:%M:%S"))
             if "ip_address" in columns:
-                row.append(attendance.get_network_name())
+                if network_name is None and ip_address:
+                    # No stored network, same fallback as get_network_name()
+                    network = match_network(ip_address)
+                    network_name = network[1] if network else ""
+                row.append(network_name or ip_address or "-")
 
             writer.writerow(row)
+            if idx % chunk_size == 0:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
 
-        return response
+        yield buffer.getvalue().encode()
 
 
 # Network CRUD Views
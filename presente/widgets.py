@@ -0,0 +1,54 @@
+from django import forms
+from django.core.exceptions import ValidationError
+
+
+class AutocompleteMixin:
+    # Select rendering only the selected options. The others are searched
+    # by TomSelect through the JSON endpoint in data-autocomplete-url, so the
+    # page does not grow with the number of users or tags.
+
+    def __init__(self, url, attrs=None):
+        super().__init__({"data-autocomplete-url": url, **(attrs or {})})
+
+    def get_selected_choices(self, values):
+        choices = self.choices
+        if hasattr(choices, "queryset"):
+            # Model choices: look up only the selected objects
+            field = choices.field
+            try:
+                objects = {
+                    str(field.prepare_value(obj)): obj
+                    for obj in choices.queryset.filter(pk__in=values)
+                }
+            except (ValueError, ValidationError):
+                objects = {}
+            selected = [
+                (value, field.label_from_instance(objects[value]))
+                for value in values
+                if value in objects
+            ]
+            if not self.allow_multiple_selected and field.empty_label is not None:
+                selected.insert(0, ("", field.empty_label))
+            return selected
+
+        # Plain choices (e.g. tag names): a value without a choice is shown
+        # as is, since new tags can be typed in
+        labels = {str(value): label for value, label in choices}
+        return [(value, labels.get(value, value)) for value in values]
+
+    def optgroups(self, name, value, attrs=None):
+        values = [v for v in dict.fromkeys(value) if v not in (None, "")]
+        choices = self.choices
+        self.choices = self.get_selected_choices(values)
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
+
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass
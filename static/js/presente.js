@@ -14,6 +14,24 @@ function setupOverlayScrollbars() {
   }
 }
 
+function autocompleteLoad(el) {
+  // Options come from the JSON endpoint in data-autocomplete-url
+  // (first page only: typing more narrows the results)
+  return function(query, callback) {
+    const url = new URL(el.dataset.autocompleteUrl, window.location.origin);
+    url.searchParams.set('q', query);
+    fetch(url, { headers: { 'Accept': 'application/json' } })
+      .then(response => response.json())
+      .then(data => callback(data.results))
+      .catch(() => callback());
+  };
+}
+
+// Results are already filtered (accents included) by the server
+function autocompleteScore() {
+  return function() { return 1; };
+}
+
 function setupTomSelect() {
   // Multi-select for users
   document.querySelectorAll('[data-tom-select="users"]').forEach(function(el) {
@@ -25,22 +43,12 @@ function setupTomSelect() {
         maxItems: null,
         preload: false,
         loadThrottle: 300,
-        onInitialize: function() {
-          // Hide dropdown initially
-          this.clearOptions();
-        },
-        load: function(query, callback) {
-          // Only load if at least 2 characters typed
-          if (query.length < 2) {
-            return callback();
-          }
-          // Reload all options and filter
-          const allOptions = Array.from(el.querySelectorAll('option')).map(opt => ({
-            value: opt.value,
-            text: opt.text
-          })).filter(opt => opt.value && opt.text.toLowerCase().includes(query.toLowerCase()));
-          callback(allOptions);
-        },
+        valueField: 'id',
+        labelField: 'text',
+        score: autocompleteScore,
+        // Only load if at least 2 characters typed
+        shouldLoad: query => query.length >= 2,
+        load: autocompleteLoad(el),
         render: {
           option: function(data, escape) {
             return '<div>' + escape(data.text) + '</div>';
@@ -63,25 +71,14 @@ function setupTomSelect() {
         maxItems: null,
         preload: false,
         loadThrottle: 300,
-        onInitialize: function() {
-          // Store all options and clear initially
-          this.allOptions = Array.from(el.querySelectorAll('option')).map(opt => ({
-            value: opt.value,
-            text: opt.text
-          })).filter(opt => opt.value);
-          this.clearOptions();
-        },
-        load: function(query, callback) {
-          // Only load if at least 2 characters typed
-          if (query.length < 2) {
-            return callback();
-          }
-          // Filter stored options
-          const filtered = this.allOptions.filter(opt =>
-            opt.text.toLowerCase().includes(query.toLowerCase())
-          );
-          callback(filtered);
-        },
+        // Tags are saved by name
+        valueField: 'name',
+        labelField: 'name',
+        searchField: ['name'],
+        score: autocompleteScore,
+        // Only load if at least 2 characters typed
+        shouldLoad: query => query.length >= 2,
+        load: autocompleteLoad(el),
         render: {
           option_create: function(data, escape) {
             return '<div class="create">Adicionar <strong>' + escape(data.input) + '</strong>&hellip;</div>';
@@ -97,6 +94,27 @@ function setupTomSelect() {
     }
   });
 
+  // Single select searched on the server (e.g. tag filters)
+  document.querySelectorAll('[data-tom-select="autocomplete"]').forEach(function(el) {
+    if (!el.tomselect) {
+      new TomSelect(el, {
+        persist: false,
+        create: false,
+        allowEmptyOption: true,
+        preload: 'focus',
+        loadThrottle: 300,
+        valueField: 'id',
+        labelField: 'name',
+        searchField: ['name'],
+        score: autocompleteScore,
+        // Empty query lists the first tags by name
+        shouldLoad: () => true,
+        load: autocompleteLoad(el),
+        placeholder: el.getAttribute('placeholder') || 'Selecione...',
+      });
+    }
+  });
+
   // Simple select dropdowns (single select)
   document.querySelectorAll('[data-tom-select="simple"]').forEach(function(el) {
     if (!el.tomselect) {
@@ -58,11 +58,12 @@ class QRCodeManager {
       }
 
       // Check if activity has ended and trigger HTMX refresh
+      // (with server push the end of the activity arrives as an event)
       if (this.endTime && !this.hasReloaded && now.getTime() >= this.endTime) {
         this.hasReloaded = true;
         const qrContainer = document.getElementById('qr-code-container');
-        if (qrContainer && typeof htmx !== 'undefined') {
-          const url = qrContainer.getAttribute('hx-get');
+        const url = qrContainer && qrContainer.getAttribute('hx-get');
+        if (url && typeof htmx !== 'undefined') {
           htmx.ajax('GET', url, {target: '#qr-code-container', swap: 'innerHTML'});
         }
       }
@@ -85,6 +86,19 @@ class QRCodeManager {
     this.intervals.push(setInterval(updateCountdown, 1000));
   }
 
+  // Draw QR Codes sent as plain URLs (QR_RENDER_MODE = "client")
+  renderClientQRCodes() {
+    if (typeof qrcode === 'undefined') return;
+
+    document.querySelectorAll('[data-qr-content]').forEach(el => {
+      const qr = qrcode(0, 'H');
+      qr.addData(el.dataset.qrContent);
+      qr.make();
+      el.innerHTML = qr.createSvgTag({cellSize: 10, margin: 10, scalable: true});
+      el.firstElementChild.classList.add('img-fluid', 'rounded', 'm-0');
+    });
+  }
+
   startQRCountdown(timeLeft) {
     const countdownText = document.getElementById('countdown-text');
     const qrLink = document.querySelector('.qr-code-link');
@@ -2,6 +2,8 @@ from allauth.account.adapter import DefaultAccountAdapter
 from allauth.socialaccount.adapter import DefaultSocialAccountAdapter
 from allauth.account.utils import user_email, user_field
 from django.conf import settings
+from .facets import update_user_facets
+from .tasks import schedule_student_data_refresh
 
 
 class CustomAccountAdapter(DefaultAccountAdapter):
@@ -10,6 +12,22 @@ class CustomAccountAdapter(DefaultAccountAdapter):
 
 
 class SuapSocialAccountAdapter(DefaultSocialAccountAdapter):
+    # Fields refreshed from SUAP on login
+    SYNC_FIELDS = [
+        "email",
+        "first_name",
+        "last_name",
+        "full_name",
+        "type",
+        "avatar_url",
+        "campus",
+        "is_suap_user",
+        "matricula",
+        "curso",
+        "periodo_referencia",
+        "student_data_updated_at",
+    ]
+
     def populate_user(self, request, sociallogin, data):
         # Extra data in: sociallogin.account.extra_data
         user = sociallogin.user
@@ -52,8 +70,10 @@ class SuapSocialAccountAdapter(DefaultSocialAccountAdapter):
     def save_user(self, request, sociallogin, form=None):
         user = super().save_user(request, sociallogin, form)
 
-        # Update user data from SUAP on every login
+        # Update user data from SUAP on every login. Only the fields that
+        # actually changed are written, usually none.
         extra_data = sociallogin.account.extra_data
+        previous = {field: getattr(user, field) for field in self.SYNC_FIELDS}
 
         # Update email (in case it changed)
         email = extra_data.get("email", "")
@@ -91,35 +111,28 @@ class SuapSocialAccountAdapter(DefaultSocialAccountAdapter):
         # Mark as SUAP user
         user.is_suap_user = True
 
-        # Fetch additional student data for ALUNO users
-        if user.type == "ALUNO":
-            try:
-                import requests
-
-                # Get SUAP_URL from the provider configuration
-                suap_url = settings.SOCIALACCOUNT_PROVIDERS.get("suap", {}).get(
-                    "SUAP_URL", "https://suap.ifrn.edu.br"
-                )
-                token = sociallogin.token.token
-                headers = {"Authorization": f"Bearer {token}"}
-                response = requests.get(
-                    f"{suap_url}/api/ensino/meus-dados-aluno/",
-                    headers=headers,
-                    timeout=10,
-                )
-                if response.status_code == 200:
-                    student_data = response.json()
-                    user.curso = student_data.get("curso", "")
-                    user.periodo_referencia = student_data.get("periodo_referencia", "")
-            except Exception:
-                # If the API call fails, just continue without the student data
-                pass
-        else:
+        # SUAP uid is the user's matrícula
+        user.matricula = sociallogin.account.uid
+
+        # Student data (curso, período) is refreshed from SUAP in the
+        # background once it is older than SUAP_STUDENT_DATA_TTL; the login
+        # goes on with the stored values
+        if user.type != "ALUNO":
             # Clear student data if user is not ALUNO anymore
             user.curso = ""
             user.periodo_referencia = ""
-
-        user.save()
+            user.student_data_updated_at = None
+
+        changed = [
+            field
+            for field in self.SYNC_FIELDS
+            if getattr(user, field) != previous[field]
+        ]
+        if changed:
+            user.save(update_fields=changed)
+            update_user_facets(user)
+        if user.type == "ALUNO":
+            schedule_student_data_refresh(user, sociallogin.token.token)
         return user
 
     def is_open_for_signup(self, request, sociallogin):
@@ -8,14 +8,19 @@ class UserAdmin(BaseUserAdmin):
         "type",
         "avatar_url",
         "is_suap_user",
+        "matricula",
     )
 
     fieldsets = BaseUserAdmin.fieldsets + (
-        ("Informações SUAP", {"fields": ("is_suap_user", "type", "avatar_url")}),
+        (
+            "Informações SUAP",
+            {"fields": ("is_suap_user", "matricula", "type", "avatar_url")},
+        ),
     )
 
     list_display = BaseUserAdmin.list_display + ("type", "is_suap_user")
     list_filter = BaseUserAdmin.list_filter + ("type", "is_suap_user")
+    search_fields = BaseUserAdmin.search_fields + ("matricula",)
 
 
 admin.site.register(User, UserAdmin)
@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.db import transaction
+from .models import User
+
+# Fields offered as choices in UserFilter
+FACET_FIELDS = ["campus", "curso", "periodo_referencia"]
+
+FACETS_CACHE_KEY = "users:facets"
+
+# Values are only added through update_user_facets, so the snapshot is
+# rebuilt once a day to drop values nobody has anymore and to pick up
+# changes made outside the SUAP login (admin, shell).
+FACETS_TIMEOUT = 60 * 60 * 24
+
+
+def compute_user_facets():
+    # One DISTINCT over the combinations of the facet fields, folded into
+    # {field: sorted values}. Empty values are left out.
+    values = {field: set() for field in FACET_FIELDS}
+    for row in User.objects.order_by().values_list(*FACET_FIELDS).distinct():
+        for field, value in zip(FACET_FIELDS, row):
+            if value:
+                values[field].add(value)
+    return {field: sorted(field_values) for field, field_values in values.items()}
+
+
+def get_user_facets():
+    facets = cache.get(FACETS_CACHE_KEY)
+    if facets is None:
+        facets = compute_user_facets()
+        cache.set(FACETS_CACHE_KEY, facets, timeout=FACETS_TIMEOUT)
+    return facets
+
+
+def get_facet_choices(field):
+    return [(value, value) for value in get_user_facets()[field]]
+
+
+def update_user_facets(user):
+    # Called when a user's SUAP data is saved. Nothing changes unless the
+    # user brings a value the snapshot does not have yet (a new campus,
+    # curso or período), which is rare; the snapshot is then dropped after
+    # commit and rebuilt on the next read. Dropping instead of editing it
+    # in place cannot lose a value to two logins racing.
+    facets = cache.get(FACETS_CACHE_KEY)
+    if facets is None:
+        return
+    for field in FACET_FIELDS:
+        value = getattr(user, field)
+        if value and value not in facets[field]:
+            transaction.on_commit(lambda: cache.delete(FACETS_CACHE_KEY))
+            return
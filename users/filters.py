@@ -1,8 +1,8 @@
 import django_filters
 from django import forms
 from django.utils.translation import gettext_lazy as _
-from django.db.models import Q
-from .models import User
+from .facets import get_facet_choices
+from .models import User, normalize_name
 
 
 class UserFilter(django_filters.FilterSet):
@@ -11,6 +11,11 @@ class UserFilter(django_filters.FilterSet):
         label=_("Nome"),
         widget=forms.TextInput(attrs={"class": "form-control"}),
     )
+    matricula = django_filters.CharFilter(
+        lookup_expr="startswith",
+        label=_("Matrícula"),
+        widget=forms.TextInput(attrs={"class": "form-control"}),
+    )
     type = django_filters.ChoiceFilter(
         choices=User.UserType.choices,
         label=_("Tipo"),
@@ -19,56 +24,33 @@ class UserFilter(django_filters.FilterSet):
     )
     campus = django_filters.ChoiceFilter(
         label=_("Campus"),
-        choices=lambda: [
-            (campus, campus)
-            for campus in User.objects.exclude(campus__isnull=True)
-            .exclude(campus="")
-            .values_list("campus", flat=True)
-            .distinct()
-            .order_by("campus")
-        ],
+        choices=lambda: get_facet_choices("campus"),
         empty_label="---------",
         widget=forms.Select(attrs={"class": "form-select"}),
     )
     curso = django_filters.ChoiceFilter(
         label=_("Curso"),
-        choices=lambda: [
-            (curso, curso)
-            for curso in User.objects.exclude(curso__isnull=True)
-            .exclude(curso="")
-            .values_list("curso", flat=True)
-            .distinct()
-            .order_by("curso")
-        ],
+        choices=lambda: get_facet_choices("curso"),
         widget=forms.Select(
             attrs={"class": "form-select", "data-tom-select": "simple"}
         ),
     )
     periodo_referencia = django_filters.ChoiceFilter(
         label=_("Período"),
-        choices=lambda: [
-            (periodo, periodo)
-            for periodo in User.objects.exclude(periodo_referencia__isnull=True)
-            .exclude(periodo_referencia="")
-            .values_list("periodo_referencia", flat=True)
-            .distinct()
-            .order_by("periodo_referencia")
-        ],
+        choices=lambda: get_facet_choices("periodo_referencia"),
         empty_label="---------",
         widget=forms.Select(attrs={"class": "form-select"}),
     )
 
     def filter_name(self, queryset, name, value):
-        return queryset.filter(
-            Q(full_name__icontains=value)
-            | Q(first_name__icontains=value)
-            | Q(last_name__icontains=value)
-        )
+        # Accent and case insensitive; a trigram index serves it on PostgreSQL
+        return queryset.filter(full_name_normalized__contains=normalize_name(value))
 
     class Meta:
         model = User
         fields = [
             "name",
+            "matricula",
             "type",
             "campus",
             "curso",
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_populate_full_name_normalized'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='matricula',
+            field=models.CharField(blank=True, db_index=True, help_text='Matrícula SUAP (uid da conta social)', max_length=150, null=True, verbose_name='Matrícula'),
+        ),
+    ]
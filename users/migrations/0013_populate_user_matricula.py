@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:33
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def populate_matricula(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    SocialAccount = apps.get_model('socialaccount', 'SocialAccount')
+
+    accounts = (
+        SocialAccount.objects.filter(provider='suap', user__is_suap_user=True)
+        .order_by('pk')
+        .values_list('user_id', 'uid')
+    )
+    batch = []
+    for user_id, uid in accounts.iterator(chunk_size=BATCH_SIZE):
+        batch.append(User(pk=user_id, matricula=uid))
+        if len(batch) >= BATCH_SIZE:
+            User.objects.bulk_update(batch, ['matricula'])
+            batch = []
+    if batch:
+        User.objects.bulk_update(batch, ['matricula'])
+
+
+def reverse_populate(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    User.objects.update(matricula=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_user_matricula'),
+        ('socialaccount', '0006_alter_socialaccount_extra_data'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_matricula, reverse_populate),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:45
+
+from django.db import migrations, models
+from django.db.models import Q
+import unicodedata
+
+BATCH_SIZE = 1000
+
+
+def normalize_name(value):
+    nfd = unicodedata.normalize('NFD', value)
+    return ''.join(char for char in nfd if unicodedata.category(char) != 'Mn').upper()
+
+
+def populate_name_fallback(apps, schema_editor):
+    # Users without full_name are now searched and sorted by first/last name
+    User = apps.get_model('users', 'User')
+    users = (
+        User.objects.filter(Q(full_name__isnull=True) | Q(full_name=''))
+        .exclude(first_name='', last_name='')
+        .order_by('pk')
+    )
+    batch = []
+    for user in users.iterator(chunk_size=BATCH_SIZE):
+        name = f'{user.first_name} {user.last_name}'.strip()
+        user.full_name_normalized = normalize_name(name) if name else None
+        batch.append(user)
+        if len(batch) >= BATCH_SIZE:
+            User.objects.bulk_update(batch, ['full_name_normalized'])
+            batch = []
+    if batch:
+        User.objects.bulk_update(batch, ['full_name_normalized'])
+
+
+def create_trigram_index(apps, schema_editor):
+    # Serves "contains" searches on the normalized name. PostgreSQL only:
+    # other databases keep the plain index. Creating the pg_trgm extension
+    # needs a role allowed to do it (it is a trusted extension since 13).
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS users_user_full_name_trgm '
+        'ON users_user USING gin (full_name_normalized gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS users_user_full_name_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_populate_user_matricula'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='full_name_normalized',
+            field=models.CharField(blank=True, db_index=True, help_text='Nome sem acentos para ordenação e busca', max_length=255, null=True, verbose_name='Nome normalizado'),
+        ),
+        migrations.RunPython(populate_name_fallback, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
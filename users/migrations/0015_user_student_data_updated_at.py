@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 01:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_full_name_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='student_data_updated_at',
+            field=models.DateTimeField(blank=True, help_text='Última atualização de curso e período a partir do SUAP', null=True, verbose_name='Dados de aluno atualizados em'),
+        ),
+    ]
@@ -5,6 +5,19 @@ from .managers import CustomUserManager
 import unicodedata
 
 
+def normalize_name(value):
+    # Uppercase without accents, used to sort and search names:
+    # "José da Conceição" -> "JOSE DA CONCEICAO"
+    # NFD = Canonical Decomposition (separates base chars from accents)
+    nfd = unicodedata.normalize("NFD", value)
+    # Filter out combining characters (accents) and convert to uppercase
+    return "".join(char for char in nfd if unicodedata.category(char) != "Mn").upper()
+
+
+# Fields full_name_normalized is computed from
+NAME_FIELDS = {"full_name", "first_name", "last_name"}
+
+
 class User(AbstractUser):
     class UserType(models.TextChoices):
         SERVIDOR = "SERVIDOR", _("Servidor")
@@ -26,7 +39,7 @@ class User(AbstractUser):
         max_length=255,
         blank=True,
         null=True,
-        help_text=_("Nome sem acentos para ordenação"),
+        help_text=_("Nome sem acentos para ordenação e busca"),
         db_index=True,
     )
     type = models.CharField(
@@ -47,6 +60,14 @@ class User(AbstractUser):
         default=False,
         help_text=_("Indica se o usuário foi criado via login SUAP"),
     )
+    matricula = models.CharField(
+        _("Matrícula"),
+        max_length=150,
+        blank=True,
+        null=True,
+        db_index=True,
+        help_text=_("Matrícula SUAP (uid da conta social)"),
+    )
     curso = models.CharField(
         _("Curso"),
         max_length=255,
@@ -61,6 +82,12 @@ class User(AbstractUser):
         null=True,
         help_text=_("Período de referência do aluno (apenas para tipo ALUNO)"),
     )
+    student_data_updated_at = models.DateTimeField(
+        _("Dados de aluno atualizados em"),
+        blank=True,
+        null=True,
+        help_text=_("Última atualização de curso e período a partir do SUAP"),
+    )
     campus = models.CharField(
         _("Campus"),
         max_length=255,
@@ -78,31 +105,41 @@ class User(AbstractUser):
         verbose_name = _("Usuário")
         verbose_name_plural = _("Usuários")
 
+    # Type as last read from or written to the database; the post_save
+    # signal (users.signals) only updates groups when it changes
+    _loaded_type = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Deferred type is left as None, which counts as changed
+        instance._loaded_type = instance.__dict__.get("type")
+        return instance
+
     def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+
         if not self.username:
             self.username = self.email
+            if update_fields is not None:
+                update_fields.add("username")
 
-        # Normalize full_name for sorting (remove accents and normalize case)
-        if self.full_name:
-            # NFD = Canonical Decomposition (separates base chars from accents)
-            nfd = unicodedata.normalize("NFD", self.full_name)
-            # Filter out combining characters (accents) and convert to uppercase
-            self.full_name_normalized = "".join(
-                char for char in nfd if unicodedata.category(char) != "Mn"
-            ).upper()
-        else:
-            self.full_name_normalized = None
+        # Normalized name for sorting and searching. Users without a full
+        # name (not created through SUAP) fall back to first and last name,
+        # the same name get_full_name() shows. Partial saves only recompute
+        # it when one of these fields is saved.
+        if update_fields is None or update_fields & NAME_FIELDS:
+            name = self.full_name or f"{self.first_name} {self.last_name}".strip()
+            self.full_name_normalized = normalize_name(name) if name else None
+            if update_fields is not None:
+                update_fields.add("full_name_normalized")
 
+        if update_fields is not None:
+            kwargs["update_fields"] = update_fields
         super().save(*args, **kwargs)
 
-    @property
-    def matricula(self):
-        if self.is_suap_user:
-            social_account = self.socialaccount_set.filter(provider="suap").first()
-            if social_account:
-                return social_account.uid
-        return None
-
     def get_full_name(self):
         if self.full_name:
             return self.full_name
@@ -0,0 +1,26 @@
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+
+SERVIDOR_GROUP = "Servidor"
+
+_servidor_group_id = None
+
+
+def ensure_servidor_group():
+    # Create the Servidor group with every Activity permission. Runs after
+    # migrate (when permissions can change) and once per process on first
+    # use; logins only need the group id.
+    from presente.models import Activity
+
+    global _servidor_group_id
+    group, _ = Group.objects.get_or_create(name=SERVIDOR_GROUP)
+    content_type = ContentType.objects.get_for_model(Activity)
+    group.permissions.set(Permission.objects.filter(content_type=content_type))
+    _servidor_group_id = group.pk
+    return group.pk
+
+
+def get_servidor_group_id():
+    if _servidor_group_id is None:
+        return ensure_servidor_group()
+    return _servidor_group_id
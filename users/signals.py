@@ -1,29 +1,27 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_migrate, post_save
 from django.dispatch import receiver
-from django.contrib.auth.models import Group, Permission
-from django.contrib.contenttypes.models import ContentType
 from .models import User
+from .permissions import ensure_servidor_group, get_servidor_group_id
 
 
 @receiver(post_save, sender=User)
 def assign_permissions_based_on_type(sender, instance, created, **kwargs):
-    from presente.models import Activity
+    # Group membership only changes with the type, so a login that keeps
+    # the type (nearly all of them) writes nothing
+    if not created and instance.type == instance._loaded_type:
+        return
+    instance._loaded_type = instance.type
 
     if instance.type == "SERVIDOR":
-        # Get or create Servidor group
-        servidor_group, _ = Group.objects.get_or_create(name="Servidor")
-
-        # Add activity permissions to the group
-        activity_content_type = ContentType.objects.get_for_model(Activity)
-        permissions = Permission.objects.filter(content_type=activity_content_type)
-        servidor_group.permissions.set(permissions)
-
         # Add user to Servidor group
-        instance.groups.add(servidor_group)
+        instance.groups.add(get_servidor_group_id())
     elif instance.type == "ALUNO":
         # Remove from Servidor group if they were in it
-        try:
-            servidor_group = Group.objects.get(name="Servidor")
-            instance.groups.remove(servidor_group)
-        except Group.DoesNotExist:
-            pass
+        instance.groups.remove(get_servidor_group_id())
+
+
+@receiver(post_migrate)
+def sync_servidor_group(sender, **kwargs):
+    # Activity permissions are created by the post_migrate of presente
+    if sender.label == "presente":
+        ensure_servidor_group()
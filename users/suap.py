@@ -0,0 +1,228 @@
+import logging
+import threading
+import time
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# Seconds to open a connection / to wait for the answer
+CONNECT_TIMEOUT = 3
+READ_TIMEOUT = 5
+
+# Retries of a call on connection errors and 502/503/504, with exponential
+# backoff (0.3 s, 0.6 s...) plus up to 0.5 s of random jitter
+RETRIES = 2
+BACKOFF_FACTOR = 0.3
+BACKOFF_JITTER = 0.5
+
+# Connections kept alive per worker process
+POOL_SIZE = 10
+
+# Calls that fail in a row before SUAP is left alone, and for how long
+FAILURE_THRESHOLD = 5
+COOLDOWN = 30
+
+# Seconds between two log lines with the client metrics (get_stats)
+STATS_LOG_INTERVAL = 5 * 60
+
+
+class SuapUnavailable(Exception):
+    # Raised instead of calling SUAP while the circuit breaker is open
+    pass
+
+
+class CircuitBreaker:
+    # closed: calls go through. open: after `threshold` failures in a row,
+    # calls are refused for `cooldown` seconds. half-open: then a single
+    # trial call goes through; its success closes the breaker, its failure
+    # opens it again.
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self.trial or time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.trial = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                logger.info("SUAP circuit breaker closed")
+            self.failures = 0
+            self.opened_at = None
+            self.trial = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial or (
+                self.opened_at is None and self.failures >= self.threshold
+            ):
+                logger.warning(
+                    "SUAP circuit breaker open for %ss after %s failures",
+                    self.cooldown,
+                    self.failures,
+                )
+                self.opened_at = time.monotonic()
+            self.trial = False
+
+    def end_trial(self):
+        with self.lock:
+            self.trial = False
+
+
+class SuapMetrics:
+    # Per-process counters of the calls made through SuapClient
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record(self, latency, failed):
+        with self.lock:
+            self.calls += 1
+            self.failures += failed
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def record_rejected(self):
+        with self.lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "avg_latency": self.total_latency / self.calls if self.calls else 0.0,
+                "max_latency": self.max_latency,
+            }
+
+
+class SuapClient:
+    # Shared by the whole process: a requests.Session keeps the connections
+    # (and TLS sessions) to SUAP alive between logins.
+
+    def __init__(self, base_url, breaker=None):
+        self.base_url = base_url.rstrip("/")
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = SuapMetrics()
+        self.stats_logged_at = time.monotonic()
+        self.session = requests.Session()
+        retry = Retry(
+            total=RETRIES,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=["GET"],
+            backoff_factor=BACKOFF_FACTOR,
+            backoff_jitter=BACKOFF_JITTER,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get_json(self, path, token):
+        self.log_stats()
+        if not self.breaker.allow():
+            self.metrics.record_rejected()
+            raise SuapUnavailable(path)
+
+        try:
+            response = self._get(path, token)
+        finally:
+            # Once the outcome is recorded this is a no-op; it only matters
+            # when the trial call raised something other than a
+            # RequestException, which would otherwise keep the breaker
+            # half-open and refuse every call for good
+            self.breaker.end_trial()
+        response.raise_for_status()
+        return response.json()
+
+    def _get(self, path, token):
+        start = time.monotonic()
+        try:
+            response = self.session.get(
+                f"{self.base_url}{path}",
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+            )
+        except requests.RequestException:
+            self._record(start, failed=True)
+            raise
+        # A client error (e.g. an expired token) still means SUAP is up
+        self._record(start, failed=response.status_code >= 500)
+        return response
+
+    def _record(self, start, failed):
+        self.metrics.record(time.monotonic() - start, failed)
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def get_student_data(self, token):
+        return self.get_json("/api/ensino/meus-dados-aluno/", token)
+
+    def get_stats(self):
+        return {**self.metrics.snapshot(), "breaker": self.breaker.state}
+
+    def log_stats(self):
+        # Metrics are per process: each one logs its own, at most once per
+        # STATS_LOG_INTERVAL, when it calls SUAP
+        now = time.monotonic()
+        if now - self.stats_logged_at < STATS_LOG_INTERVAL:
+            return
+        self.stats_logged_at = now
+        stats = self.get_stats()
+        logger.info(
+            "SUAP client: %s calls, %s failed, %s rejected, "
+            "latency avg %.3fs max %.3fs, breaker %s",
+            stats["calls"],
+            stats["failures"],
+            stats["rejected"],
+            stats["avg_latency"],
+            stats["max_latency"],
+            stats["breaker"],
+        )
+
+
+_client = None
+
+
+def get_suap_client():
+    global _client
+    if _client is None:
+        # SUAP_URL from the provider configuration
+        suap_url = settings.SOCIALACCOUNT_PROVIDERS.get("suap", {}).get(
+            "SUAP_URL", "https://suap.ifrn.edu.br"
+        )
+        _client = SuapClient(suap_url)
+    return _client
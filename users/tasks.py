@@ -0,0 +1,58 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from .facets import update_user_facets
+from .models import User
+from .suap import SuapUnavailable, get_suap_client
+
+logger = logging.getLogger(__name__)
+
+# Student data is fetched off the login request. A couple of threads per
+# worker are enough: refreshes only happen once per TTL for each student.
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="suap-refresh")
+
+
+def is_student_data_stale(user, now=None):
+    if user.student_data_updated_at is None:
+        return True
+    if now is None:
+        now = timezone.now()
+    ttl = timedelta(seconds=settings.SUAP_STUDENT_DATA_TTL)
+    return now - user.student_data_updated_at >= ttl
+
+
+def refresh_student_data(user_id, token):
+    # Runs in the executor. On failure the stored data is kept and the next
+    # login tries again.
+    try:
+        student_data = get_suap_client().get_student_data(token)
+        user = User.objects.filter(pk=user_id, type="ALUNO").first()
+        if user is None:
+            return
+        user.curso = student_data.get("curso", "")
+        user.periodo_referencia = student_data.get("periodo_referencia", "")
+        user.student_data_updated_at = timezone.now()
+        user.save(
+            update_fields=["curso", "periodo_referencia", "student_data_updated_at"]
+        )
+        update_user_facets(user)
+    except SuapUnavailable:
+        # Circuit breaker open: SUAP was failing, try on a later login
+        pass
+    except Exception:
+        logger.warning("Could not refresh SUAP student data", exc_info=True)
+    finally:
+        # Threads keep their own connection, drop it once done
+        connection.close()
+
+
+def schedule_student_data_refresh(user, token):
+    # After commit, so the job sees the user the login just saved
+    if not is_student_data_stale(user):
+        return
+    transaction.on_commit(
+        lambda: _executor.submit(refresh_student_data, user.pk, token)
+    )
@@ -1 +1,84 @@
-# Create your tests here.
+from unittest.mock import Mock, patch
+import requests
+from django.test import SimpleTestCase, TestCase
+from .models import User
+from .permissions import SERVIDOR_GROUP, ensure_servidor_group
+from .suap import CircuitBreaker, SuapClient, SuapUnavailable
+
+
+class ServidorGroupOnSaveTests(TestCase):
+    # Logins save the user with update_fields (see SuapSocialAccountAdapter);
+    # the group is only touched when the type changes
+
+    def setUp(self):
+        # The group id is cached per process, outside the counted queries
+        ensure_servidor_group()
+        self.aluno = User.objects.create_user(email="aluno@example.com", type="ALUNO")
+        self.servidor = User.objects.create_user(
+            email="servidor@example.com", type="SERVIDOR"
+        )
+
+    def in_servidor_group(self, user):
+        return user.groups.filter(name=SERVIDOR_GROUP).exists()
+
+    def test_save_with_unchanged_type_is_a_single_update(self):
+        for user in (self.aluno, self.servidor):
+            user = User.objects.get(pk=user.pk)
+            user.full_name = "Maria José"
+            with self.assertNumQueries(1):
+                user.save(update_fields=["full_name"])
+
+    def test_aluno_becoming_servidor_joins_the_group(self):
+        user = User.objects.get(pk=self.aluno.pk)
+        user.type = "SERVIDOR"
+        # UPDATE, then the INSERT ... ON CONFLICT DO NOTHING of groups.add
+        with self.assertNumQueries(2):
+            user.save(update_fields=["type"])
+        self.assertTrue(self.in_servidor_group(user))
+
+        # Saved again with the new type: nothing else to do
+        with self.assertNumQueries(1):
+            user.save(update_fields=["type"])
+
+    def test_servidor_becoming_aluno_leaves_the_group(self):
+        self.assertTrue(self.in_servidor_group(self.servidor))
+        user = User.objects.get(pk=self.servidor.pk)
+        user.type = "ALUNO"
+        # UPDATE, then the DELETE of groups.remove
+        with self.assertNumQueries(2):
+            user.save(update_fields=["type"])
+        self.assertFalse(self.in_servidor_group(user))
+
+
+class SuapCircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.client = SuapClient(
+            "https://suap.example.com", CircuitBreaker(threshold=1, cooldown=0)
+        )
+
+    def get_json(self, **kwargs):
+        with patch.object(self.client.session, "get", **kwargs):
+            return self.client.get_json("/api/", "token")
+
+    def response(self, status_code):
+        return Mock(status_code=status_code, json=Mock(return_value={}))
+
+    def test_failed_trial_opens_the_breaker_again(self):
+        self.client.breaker.cooldown = 60
+        self.client.breaker.record_failure()
+        self.client.breaker.opened_at -= 60
+        with self.assertRaises(requests.ConnectionError):
+            self.get_json(side_effect=requests.ConnectionError)
+        self.assertEqual(self.client.breaker.state, "open")
+        with self.assertRaises(SuapUnavailable):
+            self.get_json(return_value=self.response(200))
+
+    def test_unexpected_error_in_the_trial_does_not_block_the_breaker(self):
+        self.client.breaker.record_failure()
+        with self.assertRaises(ValueError):
+            self.get_json(side_effect=ValueError)
+        self.assertFalse(self.client.breaker.trial)
+
+        # The next call is a new trial, and its success closes the breaker
+        self.assertEqual(self.get_json(return_value=self.response(200)), {})
+        self.assertEqual(self.client.breaker.state, "closed")
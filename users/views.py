@@ -43,12 +43,6 @@ class UserListView(ExcludeAdminMixin, CoreFilterView):
     table_class = UserTable
     filterset_class = UserFilter
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        # Prefetch social accounts to avoid N+1 queries when accessing matricula
-        queryset = queryset.prefetch_related("socialaccount_set")
-        return queryset
-
 
 class UserCreateView(CoreCreateView):
     page_title = _("Usuários")